@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Comment, CustomUser, Genre, Review, Title
+from .models import (Category, Comment, CustomUser, Genre, OutboxEmail, Review,
+                     Title)
 
 IF_NONE = "-пусто-"
 
@@ -90,3 +91,11 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = IF_NONE
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("pk", "to", "subject", "created", "attempts", "sent_at")
+    list_filter = ("sent_at",)
+    search_fields = ("to",)
+    empty_value_display = IF_NONE
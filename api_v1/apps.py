@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_migrate
 
 
 class ApiV1Config(AppConfig):
     name = 'api_v1'
+
+    def ready(self):
+        from api_yamdb.db import check_connections, mark_released
+
+        from . import signals  # noqa: F401
+        from .search import install_search_indexes
+
+        post_migrate.connect(install_search_indexes, sender=self)
+        request_started.connect(check_connections)
+        request_finished.connect(mark_released)
@@ -0,0 +1,187 @@
+"""Async entry points of the API for ASGI serving.
+
+The DRF views stay synchronous, an async wrapper hands them to a
+bounded pool of threads. The event loop keeps serving slow clients
+while the catalogue is read from the database, and a worker opens at
+most ``ASYNC_VIEW_THREADS`` connections. Enabled with ``ASYNC_VIEWS``,
+which ``api_yamdb/asgi.py`` turns on.
+
+Django 3.2 iterates streaming responses in the event loop, where the
+queries of the export generators raise SynchronousOnlyOperation.
+``StreamingASGIHandler`` runs the iteration in a thread instead.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connections
+from django.urls import URLPattern, URLResolver
+
+from api_yamdb.db import check_connections, mark_released
+
+from .metrics import recording
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_VIEW_THREADS,
+        thread_name_prefix="api-view",
+    )
+
+
+def run_view(view, request, args, kwargs):
+    """Run a sync view in a pool thread. The request signals close the
+    connections of the event loop thread only, so the pool threads
+    look after their own connections here."""
+    close_old_connections()
+    check_connections()
+    try:
+        recorder = getattr(request, "query_recorder", None)
+        if recorder is None:
+            response = view(request, *args, **kwargs)
+        else:
+            with recording(recorder):
+                response = view(request, *args, **kwargs)
+        if callable(getattr(response, "render", None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+        mark_released()
+
+
+def async_view(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(),
+            functools.partial(run_view, view, request, args, kwargs),
+        )
+    return wrapper
+
+
+def async_patterns(patterns):
+    """Copy of the URL patterns with every view wrapped by ``async_view``.
+
+    Sync views left as they are would all share the single thread
+    Django runs sync code in under ASGI.
+    """
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                async_patterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif not asyncio.iscoroutinefunction(pattern.callback):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        result.append(pattern)
+    return result
+
+
+STREAM_BUFFER = 8
+STREAM_END = object()
+
+
+def produce_parts(response, put, stopped):
+    """Thread body of ``iterate_in_thread``, ends with STREAM_END or the
+    error raised by the response."""
+    last = STREAM_END
+    try:
+        for part in response:
+            put(part).result()
+            if stopped.is_set():
+                break
+    except Exception as error:
+        last = error
+    finally:
+        try:
+            response.close()
+        finally:
+            connections.close_all()
+            try:
+                put(last)
+            except RuntimeError:
+                # The event loop is closed, nobody is waiting.
+                pass
+
+
+async def iterate_in_thread(response):
+    """The parts of a streaming response, produced by a thread of its
+    own: a generator keeps its cursor and connection to the end. At most
+    STREAM_BUFFER parts wait for a slow client."""
+    loop = asyncio.get_running_loop()
+    parts = asyncio.Queue(STREAM_BUFFER)
+    stopped = threading.Event()
+
+    def put(item):
+        coroutine = parts.put(item)
+        try:
+            return asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except RuntimeError:
+            coroutine.close()
+            raise
+
+    threading.Thread(
+        target=produce_parts,
+        args=(response, put, stopped),
+        name="api-stream",
+        daemon=True,
+    ).start()
+    try:
+        while True:
+            part = await parts.get()
+            if part is STREAM_END:
+                return
+            if isinstance(part, Exception):
+                raise part
+            yield part
+    finally:
+        # The client is gone: unblock the producer, it stops after the
+        # part it is putting.
+        stopped.set()
+        while not parts.empty():
+            parts.get_nowait()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler sending streaming responses from a thread."""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        headers = [
+            (header.encode("ascii"), value.encode("latin1"))
+            for header, value in response.items()
+        ]
+        headers += [
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        ]
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": headers,
+        })
+        async for part in iterate_in_thread(response):
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True,
+                })
+        await send({"type": "http.response.body"})
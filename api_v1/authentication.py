@@ -0,0 +1,155 @@
+"""Optional stateless JWT authentication.
+
+Access tokens carry the username and the role of their user, so safe
+requests are authenticated from the claims without loading the user.
+The row is still loaded for unsafe requests, for tokens issued before
+the claims existed, and for users changed after the token was issued.
+The signals of ``CustomUser`` store the time of the change in its
+``claims_changed`` column, the cache and a local LRU only stand in
+front of it: an evicted entry is read again from the database, a
+missing row is never trusted.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+from .cache import get_cache
+from .models import CustomUser
+
+USERNAME_CLAIM = "username"
+ROLE_CLAIM = "role"
+ISSUED_AT_CLAIM = "iat"
+
+
+def add_user_claims(token, user):
+    token[USERNAME_CLAIM] = user.username
+    token[ROLE_CLAIM] = user.role_name
+    token[ISSUED_AT_CLAIM] = datetime_to_epoch(token.current_time)
+    return token
+
+
+def changed_key(user_id):
+    return f"api:auth:changed:{user_id}"
+
+
+class ChangedUsers:
+    """When users were last changed, as an LRU in front of the cache,
+    in front of ``CustomUser.claims_changed``.
+
+    Local entries expire after ``ttl`` seconds, so a change recorded by
+    another process is noticed within that time with a shared cache.
+    """
+
+    def __init__(self, size=10000, ttl=5):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                return entry[0]
+        changed = get_cache().get(changed_key(user_id))
+        if changed is None:
+            changed = CustomUser.objects.filter(pk=user_id).values_list(
+                "claims_changed", flat=True
+            ).first()
+            if changed is None:
+                # Deleted: none of its tokens is trusted again.
+                changed = float("inf")
+            self.store(user_id, changed)
+        self.remember(user_id, changed, now)
+        return changed
+
+    def remember(self, user_id, changed, now):
+        with self.lock:
+            self.entries[user_id] = (changed, now + self.ttl)
+            self.entries.move_to_end(user_id)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def store(self, user_id, changed):
+        # Older tokens have expired by the time the key does.
+        lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        get_cache().set(changed_key(user_id), changed, int(lifetime) + 1)
+
+    def mark(self, user_id, changed):
+        """Publish a change already stored in the database."""
+        self.store(user_id, changed)
+        self.remember(user_id, changed, time.monotonic())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+changed_users = ChangedUsers()
+
+
+class ClaimsUser:
+    """The user of a token built from its claims.
+
+    Attributes missing from the claims load the user row on first use.
+    """
+
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    role_name = CustomUser.role_name
+    is_admin = CustomUser.is_admin
+    is_moderator = CustomUser.is_moderator
+
+    def __init__(self, token):
+        self.pk = self.id = token[api_settings.USER_ID_CLAIM]
+        self.username = token[USERNAME_CLAIM]
+        self.role = token[ROLE_CLAIM]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        user = self.__dict__.get("_user")
+        if user is None:
+            user = CustomUser.objects.get(pk=self.pk)
+            self.__dict__["_user"] = user
+        return getattr(user, name)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.username
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts the claims of safe requests."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS and self.is_trusted(token):
+            return ClaimsUser(token), token
+        return self.get_user(token), token
+
+    def is_trusted(self, token):
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or token.get(ROLE_CLAIM) is None:
+            return False
+        return token.get(ISSUED_AT_CLAIM, 0) > changed_users.get(user_id)
@@ -0,0 +1,224 @@
+"""Response cache and conditional GET of the read-only endpoints.
+
+Every cached response belongs to a namespace with a version counter kept
+in the cache itself. Model signals bump the counters, so a change makes
+all the cached pages of its namespace unreachable at once. The same
+counters make the ETag of a page, so it is known without a DB query.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from api_yamdb.db import router
+
+CATEGORIES = "categories"
+GENRES = "genres"
+TITLES = "titles"
+NAMESPACES = (CATEGORIES, GENRES, TITLES)
+# Usernames are shown as authors of reviews and comments.
+AUTHORS = "authors"
+
+
+def reviews_namespace(title_id):
+    return f"reviews:{title_id}"
+
+
+def comments_namespace(review_id):
+    return f"comments:{review_id}"
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def version_key(namespace):
+    return f"api:version:{namespace}"
+
+
+def changed_key(namespace):
+    return f"api:changed:{namespace}"
+
+
+def stats_key(namespace, outcome):
+    return f"api:stats:{namespace}:{outcome}"
+
+
+def get_version(namespace):
+    """Versions start from the clock, so a counter lost on eviction
+    never repeats a version that was already handed out."""
+    cache = get_cache()
+    key = version_key(namespace)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(changed_key(namespace), time.time(), None)
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def get_state(namespaces):
+    """Versions of the namespaces and the time of the latest change."""
+    keys = [version_key(namespace) for namespace in namespaces]
+    keys += [changed_key(namespace) for namespace in namespaces]
+    values = get_cache().get_many(keys)
+    versions = tuple(
+        values.get(version_key(namespace)) or get_version(namespace)
+        for namespace in namespaces
+    )
+    changed = max(
+        values.get(changed_key(namespace), time.time())
+        for namespace in namespaces
+    )
+    return versions, changed
+
+
+def bump_version(*namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        cache.set(changed_key(namespace), time.time(), None)
+        try:
+            cache.incr(version_key(namespace))
+        except ValueError:
+            cache.add(version_key(namespace), time.time_ns(), None)
+
+
+def incr_counter(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_stats():
+    cache = get_cache()
+    keys = [
+        stats_key(namespace, outcome)
+        for namespace in NAMESPACES
+        for outcome in ("hits", "misses")
+    ]
+    values = cache.get_many(keys)
+    return {
+        namespace: {
+            "hits": values.get(stats_key(namespace, "hits"), 0),
+            "misses": values.get(stats_key(namespace, "misses"), 0),
+            "version": cache.get(version_key(namespace)),
+        }
+        for namespace in NAMESPACES
+    }
+
+
+def request_digest(request, versions):
+    """Digest of the path, the sorted query parameters, the format
+    and the versions of the data the response is made of."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    raw = (
+        f"{request.path}?{params}|{request.accepted_renderer.format}"
+        f"|{versions}"
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def response_key(namespace, request):
+    digest = request_digest(request, get_version(namespace))
+    return f"api:response:{namespace}:{digest}"
+
+
+class CachedResponseMixin:
+    """Serve the list and retrieve actions from the cache.
+
+    Authentication, permissions and throttling still run as usual,
+    only the queries and the rendering are skipped on a hit.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # The browsable API renders user-specific pages.
+        if (
+            not settings.API_CACHE_TIMEOUT
+            or request.accepted_renderer.format != "json"
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = response_key(self.cache_namespace, request)
+        cached = get_cache().get(key)
+        if cached is not None:
+            incr_counter(stats_key(self.cache_namespace, "hits"))
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        incr_counter(stats_key(self.cache_namespace, "misses"))
+        self.response_cache_key = key
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(self, "response_cache_key", None)
+        if key is not None and response.status_code == 200:
+            response.render()
+            get_cache().set(
+                key,
+                (response.content, response["Content-Type"]),
+                settings.API_CACHE_TIMEOUT,
+            )
+        return response
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve with 304 Not Modified for a matching
+    If-None-Match or a fresh If-Modified-Since.
+
+    Views return the namespaces their responses depend on from
+    ``etag_namespaces``. A page read from a replica gets no validators,
+    it may be older than the versions: the client would keep it as
+    current until the next change.
+    """
+
+    def etag_namespaces(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions, changed = get_state(self.etag_namespaces())
+        etag = quote_etag(request_digest(request, versions))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(changed)
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if router.reading_replica():
+                return response
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(changed)
+        return response
@@ -0,0 +1,180 @@
+"""Change feed of the titles, reviews and comments.
+
+Every write of them appends a ``ChangeLogEntry`` in its transaction:
+the signals log saves and deletes, the bulk inserts, which send no
+signals, call ``record_bulk``. Reviews and genre links also log an
+update of their title, the rating and genres shown with it change.
+
+Clients keep the ``since`` of the last page and ask for the entries
+after it. Ids are taken at insert but transactions commit in any order,
+a client would move past the id of a transaction still running and
+never see its entries. The feed goes by ``seq`` instead, given by
+``publish`` once the transaction has committed: the entries of a later
+commit come after all the entries the feed has shown.
+"""
+import logging
+from collections import defaultdict
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.db.models import F, Max, Min, Q
+
+from .listing import CommentList, ReviewList, TitleList
+from .models import ChangeLogEntry, ChangeLogSequence, Comment, Review, Title
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+KINDS = {
+    Title: ChangeLogEntry.TITLE,
+    Review: ChangeLogEntry.REVIEW,
+    Comment: ChangeLogEntry.COMMENT,
+}
+SOURCES = {
+    ChangeLogEntry.TITLE: (Title, TitleList),
+    ChangeLogEntry.REVIEW: (Review, ReviewList),
+    ChangeLogEntry.COMMENT: (Comment, CommentList),
+}
+KIND_NAMES = dict(ChangeLogEntry.KINDS)
+ACTION_NAMES = dict(ChangeLogEntry.ACTIONS)
+
+
+def record(model, object_id, action):
+    ChangeLogEntry.objects.create(
+        kind=KINDS[model], object_id=object_id, action=action
+    )
+    publish_on_commit()
+
+
+def record_bulk(model, object_ids, action=ChangeLogEntry.CREATE):
+    object_ids = iter(object_ids)
+    while True:
+        batch = list(islice(object_ids, BATCH_SIZE))
+        if not batch:
+            return
+        ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry(kind=KINDS[model], object_id=pk, action=action)
+            for pk in batch
+        )
+        publish_on_commit()
+
+
+def record_reset():
+    ChangeLogEntry.objects.create(action=ChangeLogEntry.RESET)
+    publish_on_commit()
+
+
+def publish_on_commit():
+    """Once per transaction, however many entries it logs."""
+    connection = transaction.get_connection()
+    if not any(func is publish for _, func in connection.run_on_commit):
+        transaction.on_commit(publish)
+
+
+def publish():
+    """Number the committed entries which have no seq yet. A failure
+    leaves them to the next commit, which numbers them as well."""
+    try:
+        number_entries()
+    except DatabaseError as error:
+        logger.warning("Change log entries are not numbered: %s", error)
+
+
+def number_entries():
+    """Give the entries without a seq the numbers after the last one,
+    in id order. The sequence row stays locked until the commit, so
+    the numbers of a later commit are greater."""
+    with transaction.atomic():
+        # An UPDATE takes the lock, SQLite ignores SELECT ... FOR UPDATE.
+        sequence = ChangeLogSequence.objects.filter(pk=1)
+        if not sequence.update(last=F("last")):
+            ChangeLogSequence.objects.create(pk=1)
+        last = sequence.values_list("last", flat=True).get()
+        unnumbered = ChangeLogEntry.objects.filter(seq__isnull=True)
+        bounds = unnumbered.aggregate(first=Min("id"), end=Max("id"))
+        if bounds["first"] is None:
+            return
+        # Entries committed meanwhile outside the bounds wait for the
+        # next call, the numbers of their ids may be taken already.
+        offset = last + 1 - bounds["first"]
+        unnumbered.filter(
+            id__gte=bounds["first"], id__lte=bounds["end"]
+        ).update(seq=F("id") + offset)
+        sequence.update(last=bounds["end"] + offset)
+
+
+def snapshot():
+    """A reset followed by the creation of every title, review and
+    comment, for the rows written before the log existed."""
+    with transaction.atomic():
+        record_reset()
+        for model in KINDS:
+            ids = model.objects.order_by("pk").values_list("pk", flat=True)
+            record_bulk(model, ids.iterator(chunk_size=BATCH_SIZE))
+
+
+def compact(entries):
+    """The last entry of every object, nothing before a reset."""
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index][3] == ChangeLogEntry.RESET:
+            entries = entries[index:]
+            break
+    last = {}
+    for entry in entries:
+        last[entry[1], entry[2]] = entry
+    return sorted(last.values())
+
+
+def current_data(entries):
+    """Representations of the objects created or updated, as in the
+    lists, one query per type."""
+    wanted = defaultdict(list)
+    for _, kind, object_id, action in entries:
+        if action in (ChangeLogEntry.CREATE, ChangeLogEntry.UPDATE):
+            wanted[kind].append(object_id)
+    data = {}
+    for kind, object_ids in wanted.items():
+        model, fast_list_class = SOURCES[kind]
+        fast_list = fast_list_class()
+        rows = fast_list.values(model.objects.filter(pk__in=object_ids))
+        for row in fast_list.represent(rows):
+            data[kind, row["id"]] = row
+    return data
+
+
+def changes_since(since, limit, kinds=None):
+    """Up to ``limit`` entries after ``since``, compacted, and the since
+    of the next page. Creates and updates carry the current data of the
+    object, clients apply both as an upsert."""
+    entries = ChangeLogEntry.objects.filter(seq__gt=since)
+    if kinds:
+        entries = entries.filter(
+            Q(kind__in=kinds) | Q(action=ChangeLogEntry.RESET)
+        )
+    page = list(entries.order_by("seq").values_list(
+        "seq", "kind", "object_id", "action"
+    )[:limit])
+    next_since = page[-1][0] if page else since
+    entries = compact(page)
+    data = current_data(entries)
+    results = []
+    for seq, kind, object_id, action in entries:
+        if (
+            action in (ChangeLogEntry.CREATE, ChangeLogEntry.UPDATE)
+            and (kind, object_id) not in data
+        ):
+            # Deleted since. Its tombstone may come before this entry: a
+            # cascade deletes the title, then logs the updates of its
+            # reviews and genre links.
+            action = ChangeLogEntry.DELETE
+        change = {
+            "seq": seq,
+            "type": KIND_NAMES.get(kind),
+            "id": object_id,
+            "action": ACTION_NAMES[action],
+        }
+        if action in (ChangeLogEntry.CREATE, ChangeLogEntry.UPDATE):
+            change["data"] = data[kind, object_id]
+        results.append(change)
+    return results, next_since, len(page) == limit
@@ -0,0 +1,68 @@
+"""Facet counts of a filtered titles list for the filter sidebars."""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField
+
+from .cache import TITLES, get_cache, get_version
+from .models import Title2Genre
+
+YEAR_BUCKET = 10
+
+
+def title_facets(queryset):
+    """Three grouped queries: titles per genre, per category and per
+    decade. Filters joining genres may repeat a title, hence DISTINCT.
+    """
+    titles = queryset.order_by()
+    genres = (
+        Title2Genre.objects.filter(title__in=titles.values("pk"))
+        .order_by()
+        .values("genre__slug", "genre__name")
+        .annotate(count=Count("title", distinct=True))
+    )
+    categories = (
+        titles.filter(category__isnull=False)
+        .values("category__slug", "category__name")
+        .annotate(count=Count("pk", distinct=True))
+    )
+    years = (
+        titles.filter(year__isnull=False)
+        .annotate(bucket=ExpressionWrapper(
+            F("year") / YEAR_BUCKET * YEAR_BUCKET,
+            output_field=IntegerField(),
+        ))
+        .values("bucket")
+        .annotate(count=Count("pk", distinct=True))
+    )
+    return {
+        "genre": sorted(
+            ({"slug": row["genre__slug"], "name": row["genre__name"],
+              "count": row["count"]} for row in genres),
+            key=lambda facet: (-facet["count"], facet["slug"]),
+        ),
+        "category": sorted(
+            ({"slug": row["category__slug"], "name": row["category__name"],
+              "count": row["count"]} for row in categories),
+            key=lambda facet: (-facet["count"], facet["slug"]),
+        ),
+        "year": [
+            {"from": row["bucket"], "to": row["bucket"] + YEAR_BUCKET - 1,
+             "count": row["count"]}
+            for row in sorted(years, key=lambda row: row["bucket"])
+        ],
+    }
+
+
+def cached_title_facets(queryset, filter_params):
+    """Facets depend only on the filters, not on the page, so they are
+    cached per filter signature and shared by all pages."""
+    signature = repr(sorted(filter_params.items()))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    key = f"api:facets:{TITLES}:{get_version(TITLES)}:{digest}"
+    facets = get_cache().get(key)
+    if facets is None:
+        facets = title_facets(queryset)
+        if settings.API_CACHE_TIMEOUT:
+            get_cache().set(key, facets, settings.API_CACHE_TIMEOUT)
+    return facets
@@ -1,8 +1,36 @@
+from django.db.models import F
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
 
 from .models import Title
 
 
+class NullsLastOrderingFilter(filters.OrderingFilter):
+    """Titles without reviews have no rating, they come last whichever
+    the direction. The fields of ``tie_breakers`` break the ties of a
+    field in the same direction, then the id does for a stable
+    pagination; the ordering is then the one of an index."""
+
+    def __init__(self, *args, tie_breakers=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tie_breakers = tie_breakers or {}
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = []
+        for param in value:
+            field = self.get_ordering_value(param)
+            names = [field.lstrip("-")]
+            names += self.tie_breakers.get(names[0], ())
+            for name in names:
+                if field.startswith("-"):
+                    ordering.append(F(name).desc(nulls_last=True))
+                else:
+                    ordering.append(F(name).asc(nulls_last=True))
+        return qs.order_by(*ordering, "id")
+
+
 class TitleFilter(filters.FilterSet):
     """Filtering infra to support slug-based filtering for genre/category,
     as well as partial name match.
@@ -13,6 +41,12 @@ class TitleFilter(filters.FilterSet):
     )
     year = filters.NumberFilter(field_name="year", lookup_expr="exact")
     name = filters.CharFilter(field_name="name", lookup_expr="icontains")
+    ordering = NullsLastOrderingFilter(
+        fields=(("name", "name"), ("year", "year"),
+                ("rating", "rating")),
+        # As /titles/top, see the title_rating_idx index.
+        tie_breakers={"rating": ("rating_count",)},
+    )
 
     class Meta:
         model = Title
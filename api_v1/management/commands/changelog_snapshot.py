@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api_v1.changes import snapshot
+
+
+class Command(BaseCommand):
+    """Log every existing title, review and comment after a reset,
+    once for a database filled before the change log existed."""
+
+    help = "Write a reset and a create of every object to the change log."
+
+    def handle(self, *args, **options):
+        snapshot()
+        self.stdout.write(self.style.SUCCESS("Change log snapshot written."))
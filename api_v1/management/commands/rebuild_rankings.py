@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api_v1.cache import TITLES, bump_version
+from api_v1.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    """Recompute the trending scores of titles from their reviews.
+    Review writes move them by their share, run it after bulk loads and
+    periodically, the shares add up rounding errors.
+    """
+
+    help = "Rebuild the trending rankings of titles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "title_ids",
+            nargs="*",
+            type=int,
+            help="Rebuild only the given titles (all titles by default).",
+        )
+
+    def handle(self, *args, **options):
+        ranked = refresh_rankings(options["title_ids"] or None)
+        bump_version(TITLES)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rankings rebuilt for {ranked} titles.")
+        )
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from api_v1.cache import TITLES, bump_version
+from api_v1.changes import record_bulk
+from api_v1.models import ChangeLogEntry, Review, Title
+
+
+class Command(BaseCommand):
+    """Recalculate the stored rating of titles from their reviews."""
+
+    help = (
+        "Rebuild rating_sum/rating_count/rating of titles from the reviews."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "title_ids",
+            nargs="*",
+            type=int,
+            help="Rebuild only the given titles (all titles by default).",
+        )
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.filter(title=OuterRef("pk")).order_by()
+        per_title = reviews.values("title")
+        titles = Title.objects.all()
+        if options["title_ids"]:
+            titles = titles.filter(pk__in=options["title_ids"])
+
+        rating_sum = Coalesce(
+            Subquery(per_title.annotate(s=Sum("score")).values("s")), 0
+        )
+        rating_count = Coalesce(
+            Subquery(per_title.annotate(c=Count("id")).values("c")), 0
+        )
+        changed = titles.annotate(
+            new_sum=rating_sum, new_count=rating_count
+        ).exclude(rating_sum=F("new_sum"), rating_count=F("new_count"))
+
+        with transaction.atomic():
+            # Bulk updates send no signals, the change feed is told here.
+            record_bulk(
+                Title,
+                changed.values_list("pk", flat=True).iterator(),
+                ChangeLogEntry.UPDATE,
+            )
+            updated = titles.update(
+                rating_sum=rating_sum, rating_count=rating_count
+            )
+            titles.update(rating=Case(When(
+                rating_count__gt=0, then=F("rating_sum") / F("rating_count")
+            )))
+        bump_version(TITLES)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rating rebuilt for {updated} titles.")
+        )
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_v1.outbox import MAX_ATTEMPTS, send_batch
+
+
+class Command(BaseCommand):
+    """Deliver the emails queued in the outbox."""
+
+    help = "Send the pending emails of the outbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="Emails sent over one connection to the mail server.",
+        )
+        parser.add_argument(
+            "--max-attempts", type=int, default=MAX_ATTEMPTS,
+            help="Give up on an email after this many failures.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling the outbox instead of exiting when empty.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0,
+            help="Seconds between polls of an empty outbox with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(
+                options["batch_size"], options["max_attempts"]
+            )
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {total_sent} emails, {total_failed} failed."
+        ))
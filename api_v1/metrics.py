@@ -0,0 +1,226 @@
+"""Per-request SQL and timing instrumentation.
+
+``request_metrics_middleware`` wraps the execution of every query of a
+request, adds a ``Server-Timing`` header, logs the slow requests with
+their SQL and aggregates per-route histograms. ``render_metrics`` shows
+them in the Prometheus text format. The histograms live in the memory
+of the process, each worker is a separate scrape target.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the duration buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` collecting the SQL and duration of queries."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """Statements run more than once, the usual sign of an N+1."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+
+class RouteStats:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.db_duration = 0.0
+        self.queries = 0
+        self.duplicate_queries = 0
+
+    def add(self, duration, recorder, duplicates):
+        for index, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.duration += duration
+        self.db_duration += recorder.duration
+        self.queries += recorder.count
+        self.duplicate_queries += duplicates
+
+
+class Registry:
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def add(self, route, duration, recorder, duplicates):
+        with self.lock:
+            if route not in self.routes:
+                self.routes[route] = RouteStats()
+            self.routes[route].add(duration, recorder, duplicates)
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+
+registry = Registry()
+
+
+def route_of(request):
+    match = getattr(request, "resolver_match", None)
+    view_name = match.view_name if match is not None else "unmatched"
+    return request.method, view_name
+
+
+@contextmanager
+def recording(recorder):
+    """Record the queries of this thread's connections."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+def is_slow(duration, recorder, duplicate_count):
+    return (
+        duration * 1000 >= settings.SLOW_REQUEST_MS
+        or recorder.count >= settings.SLOW_REQUEST_QUERIES
+        or duplicate_count >= settings.SLOW_REQUEST_DUPLICATES
+    )
+
+
+def log_slow(request, route, duration, recorder, duplicates):
+    slowest = sorted(recorder.queries, key=lambda query: -query[1])[:5]
+    lines = [
+        f"{query_duration * 1000:8.1f} ms  {sql}"
+        for sql, query_duration in slowest
+    ]
+    lines += [
+        f"{count:5d} times  {sql}"
+        for sql, count in sorted(
+            duplicates.items(), key=lambda item: -item[1]
+        )[:5]
+    ]
+    logger.warning(
+        "Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms\n%s",
+        request.method, request.get_full_path(), route[1],
+        duration * 1000, recorder.count, recorder.duration * 1000,
+        "\n".join(lines),
+    )
+
+
+def finish(request, response, started):
+    duration = time.perf_counter() - started
+    recorder = request.query_recorder
+    duplicates = recorder.duplicates()
+    duplicate_count = sum(duplicates.values()) - len(duplicates)
+    route = route_of(request)
+    registry.add(route, duration, recorder, duplicate_count)
+    response["Server-Timing"] = (
+        f"app;dur={duration * 1000:.1f}, "
+        f'db;dur={recorder.duration * 1000:.1f};'
+        f'desc="{recorder.count} queries"'
+    )
+    if is_slow(duration, recorder, duplicate_count):
+        log_slow(request, route, duration, recorder, duplicates)
+    return response
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    """Views running their queries in other threads (api_v1.async_views)
+    record them with ``request.query_recorder`` themselves."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.query_recorder = QueryRecorder()
+            started = time.perf_counter()
+            response = await get_response(request)
+            return finish(request, response, started)
+    else:
+        def middleware(request):
+            request.query_recorder = QueryRecorder()
+            started = time.perf_counter()
+            with recording(request.query_recorder):
+                response = get_response(request)
+            return finish(request, response, started)
+    return middleware
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_metrics(cache_stats=None):
+    """The histograms and counters in the Prometheus text format."""
+    with registry.lock:
+        routes = [
+            (route, vars(stats).copy())
+            for route, stats in sorted(registry.routes.items())
+        ]
+    lines = [
+        "# HELP yamdb_request_duration_seconds Request wall time.",
+        "# TYPE yamdb_request_duration_seconds histogram",
+    ]
+    for (method, view), stats in routes:
+        labels = f'method="{escape(method)}",view="{escape(view)}"'
+        for bound, count in zip(BUCKETS, stats["buckets"]):
+            lines.append(
+                f'yamdb_request_duration_seconds_bucket{{{labels},'
+                f'le="{bound}"}} {count}'
+            )
+        lines += [
+            f'yamdb_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+            f'{stats["count"]}',
+            f'yamdb_request_duration_seconds_sum{{{labels}}} '
+            f'{stats["duration"]:.6f}',
+            f'yamdb_request_duration_seconds_count{{{labels}}} '
+            f'{stats["count"]}',
+        ]
+    for name, key, help_text in (
+        ("yamdb_request_db_seconds_total", "db_duration",
+         "Time spent in SQL queries."),
+        ("yamdb_request_queries_total", "queries", "SQL queries run."),
+        ("yamdb_request_duplicate_queries_total", "duplicate_queries",
+         "Repeated SQL statements within a request."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (method, view), stats in routes:
+            lines.append(
+                f'{name}{{method="{escape(method)}",view="{escape(view)}"}} '
+                f'{stats[key]:g}'
+            )
+    if cache_stats:
+        lines += [
+            "# HELP yamdb_cache_requests_total Response cache lookups.",
+            "# TYPE yamdb_cache_requests_total counter",
+        ]
+        for namespace, stats in sorted(cache_stats.items()):
+            for outcome in ("hits", "misses"):
+                lines.append(
+                    f'yamdb_cache_requests_total{{namespace="{namespace}",'
+                    f'outcome="{outcome}"}} {stats[outcome]}'
+                )
+    return "\n".join(lines) + "\n"
@@ -4,6 +4,17 @@ from django.contrib.auth.models import AbstractUser, UserManager
 from django.core import validators
 from django.db import models
 
+USER = "user"
+MODERATOR = "moderator"
+ADMIN = "admin"
+# Roles are stored both as the codes of ROLE_CHOICES and as full names
+# (createsuperuser, the API, load_csv), every form maps to the name.
+ROLE_ALIASES = {
+    "U": USER, USER: USER,
+    "M": MODERATOR, MODERATOR: MODERATOR,
+    "A": ADMIN, ADMIN: ADMIN,
+}
+
 
 class CustomUserManager(UserManager):
     """Custom user model manager,
@@ -71,13 +82,28 @@ class CustomUser(AbstractUser):
     role = models.CharField(
         max_length=50, choices=ROLE_CHOICES, default="U"
     )
+    # Epoch seconds of the last change of a token claim, the claims of
+    # tokens issued before are not trusted, see api_v1.authentication.
+    claims_changed = models.FloatField(
+        "claims changed", default=0, editable=False
+    )
     objects = CustomUserManager()
 
+    @property
+    def role_name(self):
+        """The normalized role, resolved once per role value, so the
+        permission checks of a request do a single lookup."""
+        cached = self.__dict__.get("_role_name")
+        if cached is None or cached[0] != self.role:
+            cached = (self.role, ROLE_ALIASES.get(self.role, USER))
+            self._role_name = cached
+        return cached[1]
+
     def is_admin(self):
-        return self.role == "admin"
+        return self.role_name == ADMIN
 
     def is_moderator(self):
-        return self.role == "moderator"
+        return self.role_name == MODERATOR
 
     def __str__(self):
         return self.username
@@ -111,6 +137,64 @@ class Category(models.Model):
         return f"{self.name} {self.slug}"
 
 
+class NullsLastIndex(models.Index):
+    """Index of ``fields`` whose descending columns keep NULLs last,
+    the order of ``F(field).desc(nulls_last=True)``. PostgreSQL puts
+    them first without the modifier, SQLite puts them last already and
+    refuses it in CREATE INDEX."""
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        index = self.clone()
+        if schema_editor.connection.vendor == "postgresql":
+            index.fields_orders = [
+                (field_name, f"{order} NULLS LAST" if order else order)
+                for field_name, order in self.fields_orders
+            ]
+        return super(NullsLastIndex, index).create_sql(
+            model, schema_editor, using, **kwargs
+        )
+
+
+class TitleManager(models.Manager):
+    """Title manager with helpers to maintain the stored rating."""
+
+    def update_rating(self, title_id, score_delta, count_delta):
+        """Shift the stored score sum and review count of the title
+        in a single UPDATE, so concurrent reviews do not lose updates.
+        """
+        rating_sum = models.F("rating_sum") + score_delta
+        rating_count = models.F("rating_count") + count_delta
+        # The right-hand sides read the row as it was before the UPDATE.
+        return self.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=models.Case(
+                models.When(
+                    models.Q(rating_count__gt=-count_delta),
+                    then=rating_sum / rating_count,
+                ),
+                default=None,
+            ),
+        )
+
+    def move_rating(self, old, new):
+        """Move the share of a review in the ratings from its old
+        (title_id, score) to the new one, either may be None."""
+        shares = {}
+        for review, sign in ((old, -1), (new, 1)):
+            if review is None or review[0] is None:
+                continue
+            title_id, score = review
+            score_delta, count_delta = shares.get(title_id, (0, 0))
+            shares[title_id] = (score_delta + sign * score, count_delta + sign)
+        for title_id, (score_delta, count_delta) in shares.items():
+            if score_delta or count_delta:
+                self.update_rating(title_id, score_delta, count_delta)
+
+
+RATING_FIELDS = ("rating_sum", "rating_count", "rating")
+
+
 class Title(models.Model):
     """Defines parameters for the title."""
 
@@ -128,6 +212,19 @@ class Title(models.Model):
         verbose_name="category",
     )
     genre = models.ManyToManyField(Genre, through="Title2Genre")
+    rating_sum = models.PositiveIntegerField(
+        verbose_name="Rating sum", default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name="Rating count", default=0, editable=False
+    )
+    # Average review score rounded down, None without reviews. Stored
+    # with the sum and count, so the titles are sorted by the rating
+    # they show.
+    rating = models.PositiveSmallIntegerField(
+        verbose_name="Rating", blank=True, null=True, editable=False
+    )
+    objects = TitleManager()
 
     class Meta:
         """Constraint check added to make sure that year is in range."""
@@ -142,10 +239,64 @@ class Title(models.Model):
                 name="invalid_year",
             )
         ]
+        indexes = [
+            # Titles of a category in the default ordering.
+            models.Index(
+                fields=["category", "name"], name="title_category_name_idx"
+            ),
+            # ?ordering=-rating and /titles/top, both sort by
+            # rating DESC NULLS LAST, rating_count DESC, id.
+            NullsLastIndex(
+                fields=["-rating", "-rating_count", "id"],
+                name="title_rating_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} {self.year}"
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        """The rating columns are left out of the UPDATE of a stored
+        title, the signals of the reviews shift them in place and a
+        title read before would write the old values back."""
+        if (
+            update_fields is None
+            and not force_insert
+            and not self._state.adding
+        ):
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class TitleRanking(models.Model):
+    """Materialized trending score of a reviewed title, kept up to
+    date by ``api_v1.rankings``."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking",
+    )
+    # log of the review scores weighted by recency, see rankings.trending.
+    trending = models.FloatField("trending")
+    refreshed = models.DateTimeField("refreshed", auto_now=True)
+
+    class Meta:
+        ordering = ("-trending", "title")
+        indexes = [
+            models.Index(
+                fields=["-trending", "title"], name="ranking_trending_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title_id}: {self.trending}"
+
 
 class Title2Genre(models.Model):
     """M2M model for Titles to Genres relation tracking."""
@@ -198,6 +349,19 @@ class Review(models.Model):
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "review"
+        constraints = [
+            # Closes the race between two reviews posted at once.
+            models.UniqueConstraint(
+                fields=["title", "author"], name="unique_review"
+            ),
+        ]
+        indexes = [
+            # Backs the keyset pagination of the reviews of a title.
+            models.Index(
+                fields=["title", "pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -225,6 +389,13 @@ class Comment(models.Model):
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "comment"
+        indexes = [
+            # Backs the keyset pagination of the comments of a review.
+            models.Index(
+                fields=["review", "pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -232,3 +403,80 @@ class Comment(models.Model):
             f"Дата публикации: {self.pub_date.strftime('%m/%d/%Y, %H:%M')} "
             f"Текст: {self.text[:15]}"
         )
+
+
+class ChangeLogEntry(models.Model):
+    """An insert, update or delete of a title, review or comment, read
+    in ``seq`` order by the changes feed, see ``api_v1.changes``."""
+
+    CREATE, UPDATE, DELETE, RESET = 1, 2, 3, 4
+    ACTIONS = (
+        (CREATE, "create"),
+        (UPDATE, "update"),
+        (DELETE, "delete"),
+        # The data was replaced as a whole, clients start over.
+        (RESET, "reset"),
+    )
+    TITLE, REVIEW, COMMENT = 1, 2, 3
+    KINDS = ((TITLE, "title"), (REVIEW, "review"), (COMMENT, "comment"))
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.PositiveSmallIntegerField("type", choices=KINDS, null=True)
+    object_id = models.PositiveIntegerField("object id", null=True)
+    action = models.PositiveSmallIntegerField("action", choices=ACTIONS)
+    created = models.DateTimeField("created", auto_now_add=True)
+    # Position in the feed, given once the transaction has committed.
+    seq = models.BigIntegerField("seq", null=True, unique=True)
+
+    class Meta:
+        ordering = ("seq",)
+        indexes = [
+            models.Index(fields=["kind", "seq"], name="changelog_kind_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(seq__isnull=True),
+                name="changelog_unnumbered_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.id}: {self.get_action_display()} "
+            f"{self.get_kind_display()} {self.object_id}"
+        )
+
+
+class ChangeLogSequence(models.Model):
+    """The last ``seq`` given to the change log entries. Its single row
+    is locked while committed entries are numbered."""
+
+    last = models.BigIntegerField("last seq", default=0)
+
+    def __str__(self):
+        return str(self.last)
+
+
+class OutboxEmail(models.Model):
+    """An email waiting in the outbox for the ``send_outbox`` command."""
+
+    subject = models.CharField("subject", max_length=200)
+    body = models.TextField("body")
+    from_email = models.EmailField("from")
+    to = models.EmailField("to")
+    created = models.DateTimeField("created", auto_now_add=True)
+    next_attempt_at = models.DateTimeField("next attempt", auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField("attempts", default=0)
+    last_error = models.TextField("last error", blank=True, default="")
+    sent_at = models.DateTimeField("sent", null=True, blank=True)
+
+    class Meta:
+        ordering = ("next_attempt_at", "id")
+        indexes = [
+            models.Index(
+                fields=["sent_at", "next_attempt_at"],
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to}"
@@ -0,0 +1,94 @@
+"""Outbox of the confirmation emails.
+
+Requests only insert a row, ``send_outbox`` delivers the pending rows
+in batches over a single connection to the mail server and retries the
+failed ones with an exponential backoff.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+
+
+def queue_email(subject, body, from_email, to):
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, to=to
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before the next attempt: 30s, 1m, 2m... 1h."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def pending(max_attempts=MAX_ATTEMPTS):
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=max_attempts,
+        next_attempt_at__lte=timezone.now(),
+    )
+
+
+def send_batch(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """Send up to ``batch_size`` due emails, returns (sent, failed).
+
+    The rows are locked while they are sent, so several workers can
+    drain the outbox on databases supporting SKIP LOCKED.
+    """
+    with transaction.atomic():
+        emails = list(
+            pending(max_attempts)
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not emails:
+            return 0, 0
+        sent, failed = [], []
+        connection = get_connection()
+        try:
+            connection.open()
+            for email in emails:
+                try:
+                    EmailMessage(
+                        email.subject, email.body, email.from_email,
+                        [email.to], connection=connection,
+                    ).send()
+                except Exception as error:
+                    logger.warning("Sending email %s failed: %s",
+                                   email.pk, error)
+                    email.last_error = str(error)
+                    failed.append(email)
+                else:
+                    sent.append(email)
+        except Exception as error:
+            # The server is unreachable, the whole batch is retried.
+            logger.warning("Mail server is unavailable: %s", error)
+            failed = [email for email in emails if email not in sent]
+            for email in failed:
+                email.last_error = str(error)
+        finally:
+            connection.close()
+
+        now = timezone.now()
+        for email in sent:
+            email.sent_at = now
+            email.attempts += 1
+        for email in failed:
+            email.attempts += 1
+            email.next_attempt_at = now + timedelta(
+                seconds=backoff(email.attempts)
+            )
+        OutboxEmail.objects.bulk_update(
+            sent + failed,
+            ["sent_at", "attempts", "next_attempt_at", "last_error"],
+        )
+    return len(sent), len(failed)
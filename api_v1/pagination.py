@@ -0,0 +1,169 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db.models import BooleanField, DateTimeField, F, Value
+from django.db.models.expressions import Expression
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RowCompare(Expression):
+    """``(a, b) < (c, d)`` as a single row comparison, the index on
+    (a, b) then bounds the scan instead of filtering it."""
+
+    conditional = True
+
+    def __init__(self, lhs, operator, rhs):
+        super().__init__(output_field=BooleanField())
+        self.lhs, self.operator, self.rhs = list(lhs), operator, list(rhs)
+
+    def get_source_expressions(self):
+        return self.lhs + self.rhs
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[:len(self.lhs)], exprs[len(self.lhs):]
+
+    def as_sql(self, compiler, connection):
+        rows, params = [], []
+        for side in (self.lhs, self.rhs):
+            sqls = []
+            for expression in side:
+                sql, expression_params = compiler.compile(expression)
+                sqls.append(sql)
+                params.extend(expression_params)
+            rows.append(f"({', '.join(sqls)})")
+        return f"{rows[0]} {self.operator} {rows[1]}", params
+
+
+class PubDateCursorPagination(BasePagination):
+    """Keyset pagination, newest first, with an opaque cursor and
+    no total count.
+
+    The cursor holds the (pub_date, id) of the last row of the page and
+    the next one starts after it, ties of pub_date included: the cost
+    of a page does not grow with its depth. A previous page reads the
+    rows before the first one in the reverse order.
+    """
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "limit"
+    invalid_cursor_message = "Неверный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            ordering, operator = ("pub_date", "id"), ">"
+        else:
+            ordering, operator = ("-pub_date", "-id"), "<"
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(RowCompare(
+                (F("pub_date"), F("id")),
+                operator,
+                (Value(position[0], output_field=DateTimeField()),
+                 Value(position[1])),
+            ))
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return size if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            query = parse.parse_qs(b64decode(encoded.encode()).decode())
+            pub_date = parse_datetime(query["p"][0])
+            position = (pub_date, int(query["i"][0]))
+            reverse = bool(int(query.get("r", ["0"])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse):
+        pub_date, pk = (
+            (row["pub_date"], row["id"]) if isinstance(row, dict)
+            else (row.pub_date, row.id)
+        )
+        query = {"p": pub_date.isoformat(), "i": pk}
+        if reverse:
+            query["r"] = 1
+        encoded = b64encode(parse.urlencode(query).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Stepped past the last row, the first page is before it.
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """Limit/offset pagination unless the client opts in with
+    ``?pagination=cursor``; the next/previous links keep the parameter.
+    Deep pages then cost the same as the first one.
+    """
+    cursor_query_param = "pagination"
+    cursor_pagination_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.cursor_query_param) == "cursor":
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -25,10 +25,35 @@ class IsOwner(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         if request.user.is_authenticated:
+            # author_id avoids loading the author of every object.
             return (
-                obj.author == request.user
+                obj.author_id == request.user.pk
                 or request.user.is_admin()
                 or request.user.is_moderator()
             )
         else:
             return None
+
+
+class PermissionsByActionMixin:
+    """Pick the permissions of a viewset from ``permission_classes_by_action``
+    and fall back to ``permission_classes``.
+
+    Permissions keep no state, so they are built once per view class and
+    action instead of on every request.
+    """
+    permission_classes_by_action = {}
+
+    def get_permissions(self):
+        built = type(self).__dict__.get("_permissions_by_action")
+        if built is None:
+            built = {}
+            type(self)._permissions_by_action = built
+        permissions = built.get(self.action)
+        if permissions is None:
+            classes = self.permission_classes_by_action.get(
+                self.action, self.permission_classes
+            )
+            permissions = [permission() for permission in classes]
+            built[self.action] = permissions
+        return permissions
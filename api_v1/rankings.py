@@ -0,0 +1,152 @@
+"""Rankings of the titles behind ``/titles/top``.
+
+The rating ranking reads the rating stored with the titles, the one
+the API shows. Every reviewed title also has a ``TitleRanking`` row
+with a trending score, moved by the share of a review in the same
+transaction as the review write. Bulk loads send no signals, the
+``rebuild_rankings`` command recomputes all rows; run it now and then,
+the shares add up float rounding errors.
+
+The trending score sums the review scores, each doubled every
+``TRENDING_HALF_LIFE_DAYS`` after a fixed epoch. Weighting by the age
+from the epoch rather than from now keeps the stored scores comparable
+as time passes, they would all be divided by the same factor. The sum
+is stored as its logarithm, the weights of recent reviews overflow a
+float otherwise.
+"""
+import math
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Review, TitleRanking
+
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+CHUNK_SIZE = 2000
+# Taking off a review which is nearly the whole score leaves mostly
+# rounding errors, the score is then recomputed from the reviews.
+MIN_REMAINDER = 1e-6
+
+# The rating ranking is the ?ordering=-rating of the titles list, both
+# read the title_rating_idx index.
+ORDERINGS = {
+    "rating": (
+        F("rating").desc(nulls_last=True),
+        F("rating_count").desc(nulls_last=True),
+        "id",
+    ),
+    "trending": (F("ranking__trending").desc(), "id"),
+}
+
+
+def weight(pub_date):
+    """Natural log of the recency weight of a review."""
+    days = (pub_date - EPOCH).total_seconds() / 86400
+    return days / settings.TRENDING_HALF_LIFE_DAYS * math.log(2)
+
+
+def share(score, pub_date):
+    """log(score * weight), the term of a review in the trending sum."""
+    return math.log(score) + weight(pub_date)
+
+
+def trending(reviews):
+    """log(sum(score * weight)) of (score, pub_date) pairs, computed
+    with log-sum-exp."""
+    terms = [share(score, pub_date) for score, pub_date in reviews]
+    peak = max(terms)
+    return peak + math.log(sum(math.exp(term - peak) for term in terms))
+
+
+def build_rankings(rows):
+    """Rankings of (title_id, score, pub_date) rows sorted by title."""
+    for title_id, group in groupby(rows, itemgetter(0)):
+        yield TitleRanking(
+            title_id=title_id,
+            trending=trending([(score, date) for _, score, date in group]),
+        )
+
+
+def refresh_rankings(title_ids=None):
+    """Recompute the rankings of the given titles, of all by default.
+    Returns the number of ranked titles."""
+    reviews = Review.objects.filter(title__isnull=False).order_by(
+        "title_id"
+    ).values_list("title_id", "score", "pub_date")
+    stale = TitleRanking.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+        stale = stale.filter(title_id__in=title_ids)
+    with transaction.atomic():
+        stale.delete()
+        ranked = TitleRanking.objects.bulk_create(
+            build_rankings(reviews.iterator(chunk_size=CHUNK_SIZE)),
+            batch_size=CHUNK_SIZE,
+        )
+    return len(ranked)
+
+
+def move_trending(old, new):
+    """Move the share of a review in the trending scores from its old
+    (title_id, score, pub_date) to the new one, either may be None.
+    The rows are locked, two writes of the title at once both count."""
+    with transaction.atomic():
+        recomputed = None
+        if old is not None and old[0] is not None:
+            if not take_share(*old):
+                recomputed = old[0]
+        if new is not None and new[0] is not None and new[0] != recomputed:
+            add_share(*new)
+
+
+def add_share(title_id, score, pub_date):
+    term = share(score, pub_date)
+    ranking = TitleRanking.objects.select_for_update().filter(
+        title_id=title_id
+    ).first()
+    if ranking is None:
+        TitleRanking.objects.create(title_id=title_id, trending=term)
+        return
+    ranking.trending = logaddexp(ranking.trending, term)
+    ranking.save(update_fields=["trending", "refreshed"])
+
+
+def take_share(title_id, score, pub_date):
+    """False when the score of the title was recomputed instead, the
+    reviews as they are now are then counted already."""
+    term = share(score, pub_date)
+    ranking = TitleRanking.objects.select_for_update().filter(
+        title_id=title_id
+    ).first()
+    if ranking is None:
+        return True
+    # log(exp(trending) - exp(term)), the rest of the sum.
+    remainder = -math.expm1(term - ranking.trending)
+    if remainder < MIN_REMAINDER:
+        refresh_rankings([title_id])
+        return False
+    ranking.trending += math.log(remainder)
+    ranking.save(update_fields=["trending", "refreshed"])
+    return True
+
+
+def logaddexp(a, b):
+    """log(exp(a) + exp(b)) without overflowing."""
+    peak = max(a, b)
+    return peak + math.log1p(math.exp(-abs(a - b)))
+
+
+def top_titles(queryset, by="rating", genre=None, category=None, limit=10):
+    """The first ``limit`` titles of ``queryset`` in the given ranking,
+    read from its index."""
+    field = ORDERINGS[by][0].expression.name
+    titles = queryset.filter(**{f"{field}__isnull": False})
+    if genre:
+        titles = titles.filter(genre__slug__iexact=genre)
+    if category:
+        titles = titles.filter(category__slug__iexact=category)
+    return list(titles.order_by(*ORDERINGS[by])[:limit])
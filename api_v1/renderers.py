@@ -0,0 +1,62 @@
+"""JSON renderer on orjson.
+
+Renders the bytes of DRF's ``JSONRenderer`` with the REST_FRAMEWORK
+defaults of the project: compact, Russian text left unescaped and
+U+2028/U+2029 escaped for JavaScript. Datetimes, Decimals, lazy strings
+and the other types orjson does not encode the same way go through
+DRF's encoder. Indented output, non-default JSON settings, data orjson
+refuses and a missing orjson fall back to ``JSONRenderer``. Unlike it
+NaN and infinite floats come out as null and float exponents drop the
+plus sign and leading zeros (1e16, not 1e+16).
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in replacement of JSONRenderer in DEFAULT_RENDERER_CLASSES."""
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+        self.options = 0
+        if orjson is not None:
+            self.options = (
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            )
+
+    def can_render_fast(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.ensure_ascii is False
+            and self.compact
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not self.can_render_fast(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=self.default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # Integers over 64 bits, or types no encoder knows: let
+            # JSONRenderer render them or raise its usual error.
+            return super().render(data, accepted_media_type, renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
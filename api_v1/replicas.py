@@ -0,0 +1,46 @@
+"""Safe requests of the viewsets read from a replica, see
+``api_yamdb.db.router``."""
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.db import router
+
+from .cache import CachedResponseMixin
+
+
+class ReplicaReadsMixin:
+    """Read the models of safe requests from a replica, unless the user
+    wrote recently; pin the user to the primary after a write.
+
+    Views with a response cache read the primary: a page of a lagging
+    replica would be cached under the version bumped on the primary and
+    served to everyone, the writer included, for the whole timeout.
+    """
+
+    replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS:
+            return
+        if isinstance(self, CachedResponseMixin):
+            return
+        replicas = router.get_replicas()
+        if replicas is None:
+            return
+        if request.user.is_authenticated and router.is_pinned(
+            request.user.pk
+        ):
+            return
+        self.replica_token = router.read_alias.set(replicas.choose())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.replica_token is not None:
+            router.read_alias.reset(self.replica_token)
+            self.replica_token = None
+        elif (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            router.pin(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,232 @@
+"""Ranked full-text search over titles, reviews and comments.
+
+PostgreSQL matches ``to_tsvector`` expressions backed by GIN indexes
+and falls back to pg_trgm similarity for misspelt or partial title
+names. SQLite, used for local runs and tests, keeps FTS5 tables in sync
+with triggers and falls back to prefix matching. The indexes are
+created after ``migrate`` by ``install_search_indexes``.
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "russian"
+# Searchable columns of every table.
+KINDS = {
+    "titles": ("api_v1_title", ("name", "description")),
+    "reviews": ("api_v1_review", ("text",)),
+    "comments": ("api_v1_comment", ("text",)),
+}
+WORD = re.compile(r"\w+")
+# Whether pg_trgm is installed, per database alias. Read once per
+# process, a restart picks up an extension installed later.
+trigrams = {}
+
+
+def escape_like(text):
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+class SearchBackend:
+    id_column = "id"
+
+    def __init__(self, using="default"):
+        self.using = using
+
+
+class PostgresSearch(SearchBackend):
+
+    def document(self, columns):
+        text = " || ' ' || ".join(columns)
+        return f"to_tsvector('{SEARCH_CONFIG}', {text})"
+
+    def install(self, cursor):
+        for table, columns in KINDS.values():
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_fts_idx ON {table} "
+                f"USING gin (({self.document(columns)}))"
+            )
+        try:
+            with transaction.atomic(using=cursor.db.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError:
+            logger.warning("pg_trgm is not available, fuzzy title "
+                           "search and fast name filtering are disabled")
+            trigrams[cursor.db.alias] = False
+            return
+        trigrams[cursor.db.alias] = True
+        # The second index serves the icontains filter of TitleFilter.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS api_v1_title_name_trgm_idx "
+            "ON api_v1_title USING gin (name gin_trgm_ops)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS api_v1_title_upper_name_trgm_idx "
+            "ON api_v1_title USING gin (UPPER(name::text) gin_trgm_ops)"
+        )
+
+    def match(self, kind, query):
+        table, columns = KINDS[kind]
+        document = self.document(columns)
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        return (
+            f"FROM {table} WHERE {document} @@ {tsquery}",
+            f"ts_rank({document}, {tsquery}) DESC, id",
+            [query],
+            [query],
+        )
+
+    def has_trigrams(self):
+        if self.using not in trigrams:
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                )
+                trigrams[self.using] = cursor.fetchone() is not None
+        return trigrams[self.using]
+
+    def fuzzy_match(self, kind, query):
+        if not self.has_trigrams():
+            # The % operator does not exist without the extension.
+            return (
+                "FROM api_v1_title WHERE name ILIKE %s",
+                "name, id",
+                [f"{escape_like(query)}%"],
+                [],
+            )
+        return (
+            "FROM api_v1_title WHERE name %% %s",
+            "similarity(name, %s) DESC, id",
+            [query],
+            [query],
+        )
+
+
+class SQLiteSearch(SearchBackend):
+    id_column = "rowid"
+
+    def install(self, cursor):
+        for table, columns in KINDS.values():
+            self.install_table(cursor, table, columns)
+
+    def install_table(self, cursor, table, columns):
+        fts = f"{table}_fts"
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [fts],
+        )
+        exists = cursor.fetchone() is not None
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{column}" for column in columns)
+        old = ", ".join(f"old.{column}" for column in columns)
+        delete = (
+            f"INSERT INTO {fts}({fts}, rowid, {names}) "
+            f"VALUES ('delete', old.id, {old});"
+        )
+        insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{names}, content='{table}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        for suffix, event, body in (
+            ("ai", "INSERT", insert),
+            ("ad", "DELETE", delete),
+            ("au", "UPDATE", delete + insert),
+        ):
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_{suffix} AFTER {event} "
+                f"ON {table} BEGIN {body} END"
+            )
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    def match(self, kind, query, prefix=False):
+        fts = f"{KINDS[kind][0]}_fts"
+        words = WORD.findall(query)
+        suffix = "*" if prefix else ""
+        expression = " ".join(f'"{word}"{suffix}' for word in words)
+        return (
+            f"FROM {fts} WHERE {fts} MATCH %s",
+            "rank",
+            [expression or '""'],
+            [],
+        )
+
+    def fuzzy_match(self, kind, query):
+        return self.match(kind, query, prefix=True)
+
+
+class LikeSearch(SearchBackend):
+    """Unranked substring match for other database backends."""
+
+    def install(self, cursor):
+        pass
+
+    def match(self, kind, query):
+        table, columns = KINDS[kind]
+        condition = " OR ".join(f"{column} LIKE %s" for column in columns)
+        return (
+            f"FROM {table} WHERE {condition}",
+            "id",
+            [f"%{query}%"] * len(columns),
+            [],
+        )
+
+    def fuzzy_match(self, kind, query):
+        return self.match(kind, query)
+
+
+BACKENDS = {"postgresql": PostgresSearch, "sqlite": SQLiteSearch}
+
+
+def get_backend(using="default"):
+    return BACKENDS.get(connections[using].vendor, LikeSearch)(using)
+
+
+def install_search_indexes(using="default", **kwargs):
+    """post_migrate receiver, every statement is idempotent."""
+    with connections[using].cursor() as cursor:
+        get_backend(using).install(cursor)
+
+
+class SearchResults:
+    """Ranked matches as a lazy sequence for LimitOffsetPagination:
+    only the count and the requested page of ids are queried.
+    Titles that match no word fall back to the fuzzy search.
+    """
+
+    def __init__(self, kind, query, queryset):
+        self.queryset = queryset
+        self.backend = get_backend(queryset.db)
+        self.clause = self.backend.match(kind, query)
+        self.total = None
+        if kind == "titles" and not self.count():
+            self.clause = self.backend.fuzzy_match(kind, query)
+            self.total = None
+
+    def execute(self, sql, params):
+        with connections[self.queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self.total is None:
+            source, _, params, _ = self.clause
+            self.total = self.execute(
+                f"SELECT COUNT(*) {source}", params
+            )[0][0]
+        return self.total
+
+    def __getitem__(self, page):
+        source, order, params, order_params = self.clause
+        ids = [row[0] for row in self.execute(
+            f"SELECT {self.backend.id_column} {source} ORDER BY {order} "
+            "LIMIT %s OFFSET %s",
+            params + order_params + [page.stop - page.start, page.start],
+        )]
+        found = self.queryset.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
@@ -2,7 +2,7 @@ from datetime import MINYEAR, datetime
 
 from django.contrib.auth.models import update_last_login
 from django.core.exceptions import ValidationError
-from django.db.models import Avg
+from django.db import connection, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
@@ -10,6 +10,9 @@ from rest_framework_simplejwt.serializers import (TokenObtainSerializer,
                                                   api_settings)
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import add_user_claims
+from .cache import TITLES, bump_version
+from .changes import record_bulk
 from .models import (Category, Comment, CustomUser, Genre, Review, Title,
                      Title2Genre)
 
@@ -74,14 +77,14 @@ class MyTokenObtainSerializer(TokenObtainSerializer):
 
         code = "null"
         self.user.confirmation_code = code
-        self.user.save()
+        self.user.save(update_fields=["confirmation_code"])
         return {}
 
 
 class MyTokenObtainPairSerializer(MyTokenObtainSerializer):
     @classmethod
     def get_token(cls, user):
-        return RefreshToken.for_user(user)
+        return add_user_claims(RefreshToken.for_user(user), user)
 
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -119,7 +122,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class TitleSerializerList(serializers.ModelSerializer):
     """Simplified Serializer to support a GET operation."""
-    rating = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
     category = CategorySerializer(many=False, read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
 
@@ -142,18 +145,10 @@ class TitleSerializerList(serializers.ModelSerializer):
             "rating",
         ]
 
-    def get_rating(self, obj):
-        try:
-            return int(
-                obj.title.aggregate(rating=Avg("score"))["rating"]
-            )
-        except TypeError:
-            return None
-
 
 class TitleSerializer(serializers.ModelSerializer):
     """Serializer to support POST/PATCH/DEL operations."""
-    rating = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
     category = CategorySerializer(many=False, read_only=True, required=False)
     genre = GenreSerializer(many=True, read_only=True)
 
@@ -233,14 +228,6 @@ class TitleSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-    def get_rating(self, obj):
-        try:
-            return int(
-                obj.title.aggregate(rating=Avg("score"))["rating"]
-            )
-        except TypeError:
-            return None
-
     def validate(self, attrs):
         """Validate method makes sure that given year
         does not go far in future. Same time the model constraint
@@ -258,6 +245,103 @@ class TitleSerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
 
+class TitleBulkItemSerializer(serializers.Serializer):
+    """One title of a bulk upload, category and genres given by slug.
+    Only the input is validated here, slugs are resolved for the whole
+    batch by ``bulk_create_titles``."""
+    name = serializers.CharField(max_length=200)
+    year = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(
+        max_length=500, required=False, allow_blank=True, default=""
+    )
+    category = serializers.SlugField(required=False, allow_null=True)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False, default=list
+    )
+
+    def validate_year(self, value):
+        if value is None or MINYEAR <= value <= datetime.now().year + 2:
+            return value
+        raise serializers.ValidationError(
+            "Year of the publication cannot be "
+            "significantly grater than current year")
+
+
+def resolve_slugs(items):
+    """Two queries for all the categories and genres of the batch.
+    Returns the titles to insert with their genres, and the errors
+    of the items referring to unknown slugs."""
+    categories = Category.objects.in_bulk(
+        {data["category"] for _, data in items if data.get("category")},
+        field_name="slug",
+    )
+    genres = Genre.objects.in_bulk(
+        {slug for _, data in items for slug in data["genre"]},
+        field_name="slug",
+    )
+    resolved, errors = [], {}
+    for index, data in items:
+        slug = data.get("category")
+        unknown = [item for item in data["genre"] if item not in genres]
+        if slug and slug not in categories:
+            errors[index] = {"category": [f"Unknown category '{slug}'."]}
+        elif unknown:
+            errors[index] = {"genre": [f"Unknown genres: {unknown}."]}
+        else:
+            title = Title(
+                name=data["name"],
+                year=data.get("year"),
+                description=data["description"],
+                category=categories.get(slug),
+            )
+            title_genres = [
+                genres[item] for item in dict.fromkeys(data["genre"])
+            ]
+            resolved.append((index, title, title_genres))
+    return resolved, errors
+
+
+def bulk_create_titles(payload):
+    """Validate and insert a list of titles, returning a result per item.
+    Valid items are inserted even if others fail."""
+    items, errors = [], {}
+    for index, item in enumerate(payload):
+        serializer = TitleBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            items.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    resolved, slug_errors = resolve_slugs(items)
+    errors.update(slug_errors)
+
+    titles = [title for _, title, _ in resolved]
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+            record_bulk(Title, [title.id for title in titles])
+        else:
+            # The ids are needed for the genres.
+            for title in titles:
+                title.save()
+        Title2Genre.objects.bulk_create(
+            Title2Genre(title=title, genre=genre)
+            for _, title, title_genres in resolved
+            for genre in title_genres
+        )
+        # bulk_create sends no signals.
+        transaction.on_commit(lambda: bump_version(TITLES))
+
+    results = [
+        {"index": index, "status": "created", "id": title.id}
+        for index, title, _ in resolved
+    ]
+    results += [
+        {"index": index, "status": "error", "errors": item_errors}
+        for index, item_errors in errors.items()
+    ]
+    return sorted(results, key=lambda result: result["index"])
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Serializer to support GET operations."""
     author = serializers.SlugRelatedField(
@@ -273,7 +357,9 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 
 class ReviewSerializerCreate(serializers.ModelSerializer):
-    """Serializer to support POST operations."""
+    """Serializer to support POST operations.
+    A second review of a title by the same user is refused by the
+    unique_review constraint, see ReviewViewSet.perform_create."""
     author = serializers.SlugRelatedField(
         slug_field="username",
         queryset=CustomUser.objects.all(),
@@ -285,15 +371,6 @@ class ReviewSerializerCreate(serializers.ModelSerializer):
         read_only_fields = ("author", "title", "pub_date")
         model = Review
 
-    def validate(self, attrs):
-        """Validate method makes sure that user cannot POST review twice.
-        """
-        author = self.context["request"].user
-        title = self.context["view"].kwargs["title_id"]
-        if not (Review.objects.filter(title=title, author=author).exists()):
-            return super().validate(attrs)
-        raise serializers.ValidationError("Review already exist")
-
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
@@ -0,0 +1,196 @@
+import time
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import changes
+from .authentication import changed_users
+from .cache import (AUTHORS, CATEGORIES, GENRES, TITLES, bump_version,
+                    comments_namespace, reviews_namespace)
+from .models import (Category, ChangeLogEntry, Comment, CustomUser, Genre,
+                     Review, Title, Title2Genre)
+from .rankings import move_trending
+
+TOKEN_FIELDS = {"username", "role", "is_active"}
+SHOWN_FIELDS = ("name", "slug")
+
+
+def bump_on_commit(*namespaces):
+    """Readers must not re-cache the old rows before the change
+    is visible to them, so the versions move after the commit."""
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    bump_on_commit(CATEGORIES, TITLES)
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def genre_changed(sender, **kwargs):
+    bump_on_commit(GENRES, TITLES)
+
+
+@receiver([post_save, post_delete], sender=Title)
+@receiver([post_save, post_delete], sender=Title2Genre)
+def title_changed(sender, **kwargs):
+    bump_on_commit(TITLES)
+
+
+@receiver(pre_save, sender=Review)
+def remember_rating(sender, instance, raw=False, **kwargs):
+    """The stored title and score of a review being changed, its share
+    of the rating and the trending score is moved after the save."""
+    instance._stored_rating = None
+    if raw or instance._state.adding:
+        return
+    stored = Review.objects.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        # Two edits of the review at once would read the same score.
+        stored = stored.select_for_update()
+    instance._stored_rating = stored.values_list(
+        "title_id", "score", "pub_date"
+    ).first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, raw=False, **kwargs):
+    """The stored rating follows every save of a review: the API, the
+    admin site and the ORM."""
+    if raw:
+        return
+    old = getattr(instance, "_stored_rating", None)
+    new = (instance.title_id, instance.score, instance.pub_date)
+    if old != new:
+        Title.objects.move_rating(old and old[:2], new[:2])
+        move_trending(old, new)
+    instance._stored_rating = None
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Also sent for the reviews of a deleted user or title."""
+    Title.objects.move_rating((instance.title_id, instance.score), None)
+    move_trending((instance.title_id, instance.score, instance.pub_date), None)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """Reviews also change the rating shown with the title."""
+    bump_on_commit(TITLES, reviews_namespace(instance.title_id))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_on_commit(comments_namespace(instance.review_id))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def log_saved(sender, instance, created, **kwargs):
+    action = ChangeLogEntry.CREATE if created else ChangeLogEntry.UPDATE
+    changes.record(sender, instance.pk, action)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def log_deleted(sender, instance, **kwargs):
+    changes.record(sender, instance.pk, ChangeLogEntry.DELETE)
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Title2Genre)
+def log_title_updated(sender, instance, **kwargs):
+    """The rating and the genres are part of the title."""
+    if instance.title_id is not None:
+        changes.record(Title, instance.title_id, ChangeLogEntry.UPDATE)
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Genre)
+def remember_shown(sender, instance, raw=False, **kwargs):
+    """Titles show the name and slug of their category and genres."""
+    instance._shown_changed = False
+    if raw or instance._state.adding:
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(
+        *SHOWN_FIELDS
+    ).first()
+    instance._shown_changed = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in SHOWN_FIELDS
+    )
+
+
+@receiver(post_save, sender=Category)
+def log_category_titles(sender, instance, **kwargs):
+    if getattr(instance, "_shown_changed", False):
+        titles = Title.objects.filter(category=instance)
+        changes.record_bulk(
+            Title,
+            titles.values_list("pk", flat=True).iterator(),
+            ChangeLogEntry.UPDATE,
+        )
+
+
+@receiver(post_save, sender=Genre)
+def log_genre_titles(sender, instance, **kwargs):
+    """A deleted genre takes its links along, they log their titles."""
+    if getattr(instance, "_shown_changed", False):
+        links = Title2Genre.objects.filter(genre=instance)
+        changes.record_bulk(
+            Title,
+            links.values_list("title_id", flat=True).iterator(),
+            ChangeLogEntry.UPDATE,
+        )
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_titles(sender, instance, **kwargs):
+    """SET_NULL takes the category off its titles in a single UPDATE,
+    without their signals."""
+    instance._title_ids = list(
+        Title.objects.filter(category=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def log_uncategorized_titles(sender, instance, **kwargs):
+    changes.record_bulk(
+        Title, getattr(instance, "_title_ids", ()), ChangeLogEntry.UPDATE
+    )
+
+
+@receiver(pre_save, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Usernames are shown with reviews and comments, and the username
+    and role are claims of the issued tokens."""
+    if instance.pk is None:
+        return
+    if update_fields is not None and not TOKEN_FIELDS & set(update_fields):
+        return
+    stored = CustomUser.objects.filter(pk=instance.pk).values(
+        *TOKEN_FIELDS
+    ).first()
+    if stored is None:
+        return
+    if stored["username"] != instance.username:
+        bump_on_commit(AUTHORS)
+    if any(stored[field] != getattr(instance, field) for field in stored):
+        user_id, changed = instance.pk, time.time()
+        # Stored with the row whatever update_fields the save writes,
+        # the cache entry may be evicted.
+        instance.claims_changed = changed
+        CustomUser.objects.filter(pk=user_id).update(claims_changed=changed)
+        transaction.on_commit(lambda: changed_users.mark(user_id, changed))
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(
+        lambda: changed_users.mark(user_id, float("inf"))
+    )
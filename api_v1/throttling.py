@@ -0,0 +1,241 @@
+"""Fixed-window throttles with one atomic increment per request.
+
+DRF's throttles keep a list of request times in the cache and write it
+back on every request, which is a read and a write per request and is
+racy between workers. Here a request only increments the counter of the
+current window in a store shared by the workers, chosen by
+``settings.THROTTLE_STORE``:
+
+``sqlite:///path/to/file``   a SQLite file shared by the workers of a host
+                             (the default, in the temporary directory)
+``redis://host:port/db``     a Redis compatible server shared by the hosts
+``cache``                    the Django cache, shared only if the cache is
+
+If the store is unavailable requests are let through.
+"""
+import logging
+import random
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class StoreError(Exception):
+    pass
+
+
+class CacheStore:
+    """Atomic with memcached and Redis, per process with locmem."""
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def incr(self, key, window):
+        cache = caches[self.alias]
+        if cache.add(key, 1, window):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The window expired between add and incr.
+            cache.add(key, 1, window)
+            return 1
+
+
+class SQLiteStore:
+    """Counters in a SQLite file, one connection per thread."""
+
+    PURGE_CHANCE = 0.001
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, "
+                "expires REAL NOT NULL)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def incr(self, key, window):
+        now = time.time()
+        try:
+            connection = self.connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT INTO throttle VALUES (?, 1, ?) ON CONFLICT(key) "
+                    "DO UPDATE SET count = count + 1",
+                    (key, now + window),
+                )
+                count = connection.execute(
+                    "SELECT count FROM throttle WHERE key = ?", (key,)
+                ).fetchone()[0]
+                if random.random() < self.PURGE_CHANCE:
+                    connection.execute(
+                        "DELETE FROM throttle WHERE expires < ?", (now,)
+                    )
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as error:
+            raise StoreError(error) from error
+        return count
+
+
+class RedisStore:
+    """Speaks RESP directly: SET NX EX and INCR in one round trip."""
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None,
+                 timeout=0.5):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @staticmethod
+    def encode(*args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    @staticmethod
+    def read_reply(stream):
+        line = stream.readline()
+        if not line.endswith(b"\r\n"):
+            raise StoreError("Connection closed by the server")
+        kind, value = line[:1], line[1:-2]
+        if kind == b"-":
+            raise StoreError(value.decode())
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            if value == b"-1":
+                return None
+            return stream.read(int(value) + 2)[:-2]
+        return value
+
+    def connect(self):
+        sock = socket.create_connection(self.address, self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = sock.makefile("rb")
+        commands = []
+        if self.password:
+            commands.append(self.encode("AUTH", self.password))
+        if self.db:
+            commands.append(self.encode("SELECT", self.db))
+        if commands:
+            sock.sendall(b"".join(commands))
+            for _ in commands:
+                self.read_reply(stream)
+        return sock, stream
+
+    def incr(self, key, window):
+        try:
+            if getattr(self.local, "connection", None) is None:
+                self.local.connection = self.connect()
+            sock, stream = self.local.connection
+            sock.sendall(
+                self.encode("SET", key, 0, "EX", window, "NX")
+                + self.encode("INCR", key)
+            )
+            self.read_reply(stream)
+            return self.read_reply(stream)
+        except (OSError, StoreError) as error:
+            self.close()
+            raise StoreError(error) from error
+
+    def close(self):
+        connection = getattr(self.local, "connection", None)
+        self.local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+
+def create_store(url):
+    if url == "cache":
+        return CacheStore()
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite":
+        return SQLiteStore(unquote(parts.path))
+    if parts.scheme == "redis":
+        return RedisStore(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(parts.path.strip("/") or 0),
+            password=parts.password,
+        )
+    raise ValueError(f"Unknown throttle store: {url}")
+
+
+_stores = {}
+
+
+def get_store():
+    url = settings.THROTTLE_STORE
+    if url not in _stores:
+        _stores[url] = create_store(url)
+    return _stores[url]
+
+
+class FixedWindowMixin:
+    """Count the requests of the current window of ``duration`` seconds.
+
+    A client may burst up to twice the rate across a window boundary,
+    in exchange every request costs a single increment.
+    """
+
+    def get_store(self):
+        return get_store()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        now = time.time()
+        window = int(now // self.duration)
+        try:
+            count = self.get_store().incr(
+                f"{key}:{window}", self.duration
+            )
+        except StoreError as error:
+            logger.warning("Throttle store is unavailable: %s", error)
+            return True
+        self.wait_seconds = (window + 1) * self.duration - now
+        return count <= self.num_requests
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserFixedWindowThrottle(FixedWindowMixin, UserRateThrottle):
+    pass
+
+
+class AnonFixedWindowThrottle(FixedWindowMixin, AnonRateThrottle):
+    pass
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from . import views
-from .views import MyTokenObtainPairView, UsersViewSet, send_mail_verify
+from .async_views import async_patterns
+from .views import (MyTokenObtainPairView, UsersViewSet, cache_stats, metrics,
+                    search, send_mail_verify)
 
 LIST_METHODS = {"get": "list", "post": "create"}
 
@@ -14,6 +17,8 @@ category_list = views.CategoryViewSetList.as_view(LIST_METHODS)
 category_detail = views.CategoryViewSetDetail.as_view(DEL_METHOD)
 genre_list = views.GenreViewSetList.as_view(LIST_METHODS)
 genre_detail = views.GenreViewSetDetail.as_view(DEL_METHOD)
+title_bulk = views.TitleViewSet.as_view({"post": "bulk"})
+title_top = views.TitleViewSet.as_view({"get": "top"})
 
 router_v1 = DefaultRouter()
 router_v1.register("users", UsersViewSet, basename="users")
@@ -45,5 +50,19 @@ urlpatterns = [
     ),
     path("genres/", genre_list, name="genres_list"),
     path("genres/<slug:slug>/", genre_detail, name="genres_detail"),
+    path("cache/stats/", cache_stats, name="cache_stats"),
+    path("metrics/", metrics, name="metrics"),
+    path(
+        "export/<slug:dataset>.<slug:extension>",
+        views.ExportView.as_view(),
+        name="export",
+    ),
+    path("search/", search, name="search"),
+    path("changes/", views.changes_feed, name="changes"),
+    path("titles/bulk", title_bulk, name="title_bulk"),
+    path("titles/top", title_top, name="title_top"),
     path("", include(router_v1.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_patterns(urlpatterns)
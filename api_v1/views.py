@@ -1,41 +1,81 @@
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
-from rest_framework import filters, mixins, viewsets
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from api_yamdb import settings
 
-from . import serializers
+from . import cache, changes, export, rankings, serializers
+from .facets import cached_title_facets
 from .filters import TitleFilter
-from .models import Category, CustomUser, Genre, Review, Title
-from .permissions import IsAdminPermission, IsOwner, ReadOnly
+from .listing import CommentList, FastListMixin, ReviewList, TitleList
+from .metrics import render_metrics
+from .models import Category, Comment, CustomUser, Genre, Review, Title
+from .outbox import queue_email
+from .pagination import OptionalCursorPagination
+from .permissions import (IsAdminPermission, IsOwner, PermissionsByActionMixin,
+                          ReadOnly)
+from .replicas import ReplicaReadsMixin
+from .search import KINDS, SearchResults
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def send_mail_verify(self):
-    """Send an email with a randomly generated confirmation_code.
+    """Queue an email with a randomly generated confirmation_code,
+    it is sent by the ``send_outbox`` command.
     """
     code = get_random_string(length=12)
     user = get_object_or_404(CustomUser, email=self.data["email"])
     user.confirmation_code = code
-    user.save()
     message = "Код для получения JWT token " + code
-    user.email_user(
-        "Confirmation_code_APITOKEN",
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-    )
+    with transaction.atomic():
+        user.save(update_fields=["confirmation_code"])
+        queue_email(
+            "Confirmation_code_APITOKEN",
+            message,
+            settings.DEFAULT_FROM_EMAIL,
+            user.email,
+        )
     return HttpResponse("Код сгенерирован и успешно отправлен!")
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPermission])
+def cache_stats(request):
+    """Hit/miss counters of the response cache to tune its timeout.
+    """
+    return Response({
+        "timeout": settings.API_CACHE_TIMEOUT,
+        "namespaces": cache.get_stats(),
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPermission])
+def metrics(request):
+    """Request histograms of this process for Prometheus.
+    """
+    return HttpResponse(
+        render_metrics(cache.get_stats()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+class UsersViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     """A ViewSet for viewing all users instances.
     """
     serializer_class = serializers.CustomUserSerializer
@@ -76,23 +116,24 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = serializers.MyTokenObtainPairSerializer
 
 
-class GetPostPlaceholder(viewsets.GenericViewSet,
+class GetPostPlaceholder(ReplicaReadsMixin, viewsets.GenericViewSet,
                          mixins.ListModelMixin,
                          mixins.CreateModelMixin):
     """Class placeholder inherits mixins to supports only GET/POST methods."""
     pass
 
 
-class DelPlaceholder(viewsets.GenericViewSet,
+class DelPlaceholder(ReplicaReadsMixin, viewsets.GenericViewSet,
                      mixins.DestroyModelMixin):
     """Class placeholder inherits mixins to supports only DELETE method."""
     pass
 
 
-class CategoryViewSetList(GetPostPlaceholder):
+class CategoryViewSetList(cache.CachedResponseMixin, GetPostPlaceholder):
     """CategoryVSList supports only GET/POST methods.
     Modifications can be done by administrator only, while GET any.
     """
+    cache_namespace = cache.CATEGORIES
     http_method_names = ["get", "post"]
     queryset = Category.objects.all()  # noqa
     serializer_class = serializers.CategorySerializer
@@ -124,10 +165,11 @@ class CategoryViewSetDetail(DelPlaceholder):
     ]
 
 
-class GenreViewSetList(GetPostPlaceholder):
+class GenreViewSetList(cache.CachedResponseMixin, GetPostPlaceholder):
     """GenreVSList supports only GET/POST methods.
     Modifications can be done by administrator only, while GET any.
     """
+    cache_namespace = cache.GENRES
     http_method_names = ["get", "post"]
     queryset = Genre.objects.all()  # noqa
     serializer_class = serializers.GenreSerializer
@@ -159,14 +201,95 @@ class GenreViewSetDetail(DelPlaceholder):
     ]
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadsMixin, cache.ConditionalGetMixin,
+                   cache.CachedResponseMixin, PermissionsByActionMixin,
+                   FastListMixin, viewsets.ModelViewSet):
     """Basic functionality introduced with a
-    method-depending serializer selector."""
-    queryset = Title.objects.all()  # noqa
+    method-depending serializer selector.
+    Category is joined and genres are prefetched, so a page of titles
+    costs a fixed number of queries whatever its size."""
+    queryset = Title.objects.select_related(
+        "category"
+    ).prefetch_related("genre")
+    cache_namespace = cache.TITLES
+    fast_list_class = TitleList
+    bulk_max_items = 1000
+    top_max_items = 100
 
     permission_classes = [IsAdminPermission | ReadOnly]
     filterset_class = TitleFilter  # noqa
 
+    def etag_namespaces(self):
+        return [cache.TITLES]
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Create a list of titles at once.
+        Answers 201 if all of them are created, 207 if some are and
+        400 if none, with a result for every item.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError("Ожидается список произведений.")
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError(
+                f"Не более {self.bulk_max_items} произведений за запрос."
+            )
+        results = serializers.bulk_create_titles(request.data)
+        created = sum(result["status"] == "created" for result in results)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=code)
+
+    @action(detail=False)
+    def top(self, request):
+        """Best rated titles, ?by=trending for the ones well reviewed
+        lately. ?genre= and ?category= slugs narrow the ranking, ?limit=
+        sets its length, up to top_max_items.
+        """
+        return self.cached_response(self.top_titles, request)
+
+    def top_titles(self, request):
+        params = request.query_params
+        by = params.get("by", "rating")
+        if by not in rankings.ORDERINGS:
+            raise ValidationError(
+                {"by": f"Выберите из: {', '.join(rankings.ORDERINGS)}."}
+            )
+        limit = params.get("limit", "10")
+        if not limit.isdigit() or not 0 < int(limit) <= self.top_max_items:
+            raise ValidationError(
+                {"limit": f"Укажите число от 1 до {self.top_max_items}."}
+            )
+        titles = rankings.top_titles(
+            self.get_queryset(),
+            by=by,
+            genre=params.get("genre"),
+            category=params.get("category"),
+            limit=int(limit),
+        )
+        serializer = serializers.TitleSerializerList(titles, many=True)
+        return Response(serializer.data)
+
+    def get_paginated_response(self, data):
+        """?facets=true adds title counts per genre, category and decade
+        of the whole filtered list to the page."""
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get("facets") in ("true", "1"):
+            params = self.request.query_params
+            filters = {
+                name: params.getlist(name)
+                for name in TitleFilter.base_filters
+                if name in params and name != "ordering"
+            }
+            response.data["facets"] = cached_title_facets(
+                self.filter_queryset(self.get_queryset()), filters
+            )
+        return response
+
     def get_serializer_class(self):
         """Following added to assign a different serializer
         depending on request method.
@@ -176,7 +299,10 @@ class TitleViewSet(viewsets.ModelViewSet):
         return serializers.TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ReplicaReadsMixin, cache.ConditionalGetMixin, PermissionsByActionMixin,
+    FastListMixin, viewsets.ModelViewSet
+):
     """Basic functionality introduced with a
     method-depending serializer selector and permissions depending action.
     """
@@ -186,9 +312,17 @@ class ReviewViewSet(viewsets.ModelViewSet):
         "partial_update": [IsOwner],
         "destroy": [IsOwner],
     }
+    pagination_class = OptionalCursorPagination
+    fast_list_class = ReviewList
     search_fields = ["title__title_id"]
     http_method_names = ["get", "post", "patch", "delete"]
 
+    def etag_namespaces(self):
+        return [
+            cache.reviews_namespace(self.kwargs["title_id"]),
+            cache.AUTHORS,
+        ]
+
     def get_queryset(self):
         queryset = Review.objects.filter(title=self.kwargs["title_id"])
         title_id = self.request.query_params.get("title", None)
@@ -200,8 +334,39 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
+        """The review and the rating it shifts are written together.
+        A second review of the title by the user breaks unique_review,
+        it is answered as the serializer validation used to; any other
+        integrity error is not ours to hide.
+        """
         title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        serializer.save(author=self.request.user, title_id=title.id)
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title_id=title.id)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title_id=title.id, author=self.request.user
+            ).exists():
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Review already exist"]}
+            )
+
+    def perform_update(self, serializer):
+        """The old score is read under a row lock, so the stored
+        rating of the title is shifted by the exact difference.
+        """
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Of two deletes of the review at once only the one finding
+        the locked row takes its score off the rating."""
+        with transaction.atomic():
+            if Review.objects.select_for_update().filter(
+                pk=instance.pk
+            ).exists():
+                instance.delete()
 
     def get_serializer_class(self):
         """Following added to assign a different serializer
@@ -211,23 +376,17 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return serializers.ReviewSerializerCreate
         return serializers.ReviewSerializer
 
-    def get_permissions(self):
-        try:
-            return [
-                permission()
-                for permission in self.permission_classes_by_action[
-                    self.action
-                ]
-            ]
-        except KeyError:
-            return [permission() for permission in self.permission_classes]
-
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ReplicaReadsMixin, cache.ConditionalGetMixin, PermissionsByActionMixin,
+    FastListMixin, viewsets.ModelViewSet
+):
     """Basic functionality introduced with a
     method-depending serializer selector and permissions depending action.
     """
     serializer_class = serializers.CommentSerializer
+    pagination_class = OptionalCursorPagination
+    fast_list_class = CommentList
     permission_classes = [IsAdminPermission | IsAuthenticatedOrReadOnly]
     permission_classes_by_action = {
         "create": [IsAuthenticated],
@@ -236,6 +395,12 @@ class CommentViewSet(viewsets.ModelViewSet):
         "destroy": [IsOwner],
     }
 
+    def etag_namespaces(self):
+        return [
+            cache.comments_namespace(self.kwargs["review_id"]),
+            cache.AUTHORS,
+        ]
+
     def get_queryset(self):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
         return review.comments.all()
@@ -244,13 +409,107 @@ class CommentViewSet(viewsets.ModelViewSet):
         review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
         serializer.save(author=self.request.user, review=review)
 
-    def get_permissions(self):
-        try:
-            return [
-                permission()
-                for permission in self.permission_classes_by_action[
-                    self.action
-                ]
-            ]
-        except KeyError:
-            return [permission() for permission in self.permission_classes]
+
+SEARCH_SOURCES = {
+    "titles": (TitleViewSet.queryset, serializers.TitleSerializerList),
+    "reviews": (
+        Review.objects.select_related("author"),
+        serializers.ReviewSerializer,
+    ),
+    "comments": (
+        Comment.objects.select_related("author"),
+        serializers.CommentSerializer,
+    ),
+}
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def search(request):
+    """Full-text search, best matches first.
+    ?q= is the text to look for, ?type= one of titles/reviews/comments.
+    """
+    query = request.query_params.get("q", "").strip()
+    kind = request.query_params.get("type", "titles")
+    if not query:
+        raise ValidationError({"q": "Укажите текст для поиска."})
+    if kind not in KINDS:
+        raise ValidationError({"type": f"Выберите из: {', '.join(KINDS)}."})
+
+    queryset, serializer_class = SEARCH_SOURCES[kind]
+    paginator = LimitOffsetPagination()
+    page = paginator.paginate_queryset(
+        SearchResults(kind, query, queryset), request
+    )
+    serializer = serializer_class(
+        page, many=True, context={"request": request}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+CHANGE_TYPES = {name: kind for kind, name in changes.KIND_NAMES.items()}
+CHANGES_MAX_LIMIT = 1000
+
+
+def changes_params(params):
+    since = params.get("since", "0")
+    if not since.isdigit():
+        raise ValidationError({"since": "Укажите seq последнего изменения."})
+    limit = params.get("limit", "100")
+    if not limit.isdigit() or not 0 < int(limit) <= CHANGES_MAX_LIMIT:
+        raise ValidationError(
+            {"limit": f"Укажите число от 1 до {CHANGES_MAX_LIMIT}."}
+        )
+    names = [name for name in params.get("type", "").split(",") if name]
+    unknown = set(names) - set(CHANGE_TYPES)
+    if unknown:
+        raise ValidationError(
+            {"type": f"Выберите из: {', '.join(CHANGE_TYPES)}."}
+        )
+    return int(since), int(limit), [CHANGE_TYPES[name] for name in names]
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def changes_feed(request):
+    """Creates, updates and deletes of titles, reviews and comments after
+    ?since= (0 for all of them), oldest first. ?type= limits them to
+    comma separated types, ?limit= sets the page size.
+    A "reset" means the data was replaced, clients drop their copy.
+    """
+    since, limit, kinds = changes_params(request.query_params)
+    results, next_since, more = changes.changes_since(since, limit, kinds)
+    url = request.build_absolute_uri()
+    return Response({
+        "since": next_since,
+        "next": replace_query_param(url, "since", next_since) if more
+        else None,
+        "results": results,
+    })
+
+
+class StreamContentNegotiation(DefaultContentNegotiation):
+    """The format of an export comes from its URL, the Accept header
+    of the client must not turn it into 406 Not Acceptable."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportView(APIView):
+    """Stream a whole dataset as CSV or NDJSON, e.g. /export/titles.csv.
+    """
+    permission_classes = [IsAuthenticated, IsAdminPermission]
+    content_negotiation_class = StreamContentNegotiation
+
+    def get(self, request, dataset, extension):
+        if dataset not in export.DATASETS or extension not in export.FORMATS:
+            raise Http404
+        content_type, lines = export.export(dataset, extension)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{dataset}.{extension}"'
+        )
+        # nginx would buffer the whole export before sending it.
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -1,7 +1,18 @@
+"""ASGI entry point, for uvicorn workers:
+
+    gunicorn api_yamdb.asgi:application -c python:api_yamdb.gunicorn_conf \\
+        -k uvicorn.workers.UvicornWorker
+"""
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+django.setup(set_prefix=False)
+
+from api_v1.async_views import StreamingASGIHandler  # noqa: E402
 
-application = get_asgi_application()
+# get_asgi_application() with the exports streamed from a thread.
+application = StreamingASGIHandler()
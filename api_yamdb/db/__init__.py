@@ -0,0 +1,90 @@
+"""Persistent database connections: health checks and a pool.
+
+With ``CONN_MAX_AGE`` a connection outlives the request, it may have
+been dropped by the server or a proxy while the worker was idle. Before
+a request uses a connection idle for more than
+``DB_HEALTH_CHECK_INTERVAL`` seconds it is pinged and replaced if dead.
+"""
+import queue
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def mark_released(**kwargs):
+    """request_finished receiver."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.released_at = now
+
+
+def check_connections(**kwargs):
+    """request_started receiver."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        released_at = getattr(connection, "released_at", None)
+        if released_at is None:
+            continue
+        if now - released_at < settings.DB_HEALTH_CHECK_INTERVAL:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+class ConnectionPool:
+    """Idle connections shared by the threads of a worker.
+
+    ``get`` opens a connection with ``connect`` when none is idle, at
+    most ``size`` connections are kept, the others are closed when
+    they are released. An idle connection closed meanwhile is dropped,
+    one idle for more than ``DB_HEALTH_CHECK_INTERVAL`` seconds is
+    pinged first: the server may have been restarted or timed it out.
+    """
+
+    def __init__(self, size):
+        # (connection, monotonic time it was released)
+        self.idle = queue.LifoQueue(size)
+
+    def get(self, connect):
+        while True:
+            try:
+                connection, released_at = self.idle.get_nowait()
+            except queue.Empty:
+                return connect()
+            if getattr(connection, "closed", False):
+                continue
+            idle_for = time.monotonic() - released_at
+            if (
+                idle_for < settings.DB_HEALTH_CHECK_INTERVAL
+                or self.ping(connection)
+            ):
+                return connection
+            self.discard(connection)
+
+    def put(self, connection):
+        try:
+            # Ends the transaction left open by an error.
+            connection.rollback()
+            self.idle.put_nowait((connection, time.monotonic()))
+        except Exception:
+            self.discard(connection)
+
+    def ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
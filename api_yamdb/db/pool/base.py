@@ -0,0 +1,43 @@
+"""PostgreSQL backend taking its connections from a per-process pool.
+
+For threaded gunicorn workers with ``CONN_MAX_AGE = 0``: a request gets
+an idle connection of the worker instead of connecting to the server,
+and hands it back when it is closed at the end of the request.
+``POOL_SIZE`` in the database settings bounds the idle connections.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+
+from api_yamdb.db import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+# A forked worker must not use the connections of its parent.
+os.register_at_fork(after_in_child=pools.clear)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self):
+        with pools_lock:
+            pool = pools.get(self.alias)
+            if pool is None:
+                pool = ConnectionPool(self.settings_dict.get("POOL_SIZE", 10))
+                pools[self.alias] = pool
+        return pool
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool().get(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().put(self.connection)
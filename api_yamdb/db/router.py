@@ -0,0 +1,119 @@
+"""Reads of the API viewsets on the replicas, writes on the primary.
+
+The ``DATABASE_REPLICAS`` aliases take the safe requests of the
+viewsets in turn, ``ReplicaReadsMixin`` sets the alias of a request
+in ``read_alias`` and ``ReplicaRouter`` reads the models there. Every
+other query, including the authentication done before, the writes and
+the management commands, stays on ``default``.
+
+A replica is pinged before it is chosen, at most once every
+``REPLICA_HEALTH_CHECK_INTERVAL`` seconds, and skipped until the next
+check if the ping failed. Without a healthy replica reads go to the
+primary.
+
+Replicas lag behind the primary: a user who just wrote would not find
+the review in the next list. The safe requests of a user are kept on
+the primary for ``REPLICA_STICKY_SECONDS`` after a write, the pin is
+kept in the cache so it holds across the workers. For the same reason
+the responses cached or tagged under the versions of ``api_v1.cache``,
+which move with the primary, are not made from a replica.
+"""
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+read_alias = ContextVar("read_alias", default=None)
+
+
+def pinned_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def pin(user_id):
+    """Keep the reads of the user on the primary for a while."""
+    if settings.REPLICA_STICKY_SECONDS > 0:
+        cache.set(pinned_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pinned_key(user_id), False)
+
+
+def reading_replica():
+    """Whether the models of the current request are read from a
+    replica."""
+    return read_alias.get() not in (None, DEFAULT_DB_ALIAS)
+
+
+class ReplicaSet:
+    """Round robin over the healthy aliases of ``aliases``."""
+
+    def __init__(self, aliases):
+        self.aliases = list(aliases)
+        self.turns = itertools.cycle(self.aliases)
+        self.lock = threading.Lock()
+        # alias -> (healthy, monotonic time of the check)
+        self.checks = {}
+
+    def ping(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except DatabaseError:
+            connection.close()
+            return False
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        healthy, checked_at = self.checks.get(alias, (None, None))
+        if (
+            healthy is None
+            or now - checked_at >= settings.REPLICA_HEALTH_CHECK_INTERVAL
+        ):
+            healthy = self.ping(alias)
+            self.checks[alias] = (healthy, now)
+        return healthy
+
+    def choose(self):
+        """The next healthy replica, or the primary."""
+        for _ in self.aliases:
+            with self.lock:
+                alias = next(self.turns)
+            if self.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+
+replica_sets = {}
+
+
+def get_replicas():
+    """The ReplicaSet of ``settings.DATABASE_REPLICAS``, None without
+    replicas."""
+    aliases = tuple(settings.DATABASE_REPLICAS)
+    if not aliases:
+        return None
+    if aliases not in replica_sets:
+        replica_sets.setdefault(aliases, ReplicaSet(aliases))
+    return replica_sets[aliases]
+
+
+class ReplicaRouter:
+    """Models are read from ``read_alias`` when a request set it."""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary.
+        return True
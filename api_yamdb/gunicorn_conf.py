@@ -0,0 +1,67 @@
+"""gunicorn settings: ``gunicorn -c python:api_yamdb.gunicorn_conf``.
+
+Threaded workers (gthread) keep serving while a thread waits for the
+database or the mail server, and share the persistent connections or
+the pool of api_yamdb.db.pool. The application is loaded once before
+the workers are forked (preload), so they start fast and share memory.
+Every value can be overridden from the environment.
+
+For ASGI serving set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+and run api_yamdb.asgi:application, threads are then not used by
+gunicorn, the views get ASYNC_VIEW_THREADS threads instead.
+
+The workers share the cache versions, the ETags, the replica pins and
+the changed users through the Django cache: with several workers it
+must be a shared one (CACHE_BACKEND, memcached in docker-compose.yaml),
+gunicorn refuses to start with the per-process locmem cache.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get(
+    "GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1
+))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+# nginx keeps the connections to the workers open.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Recycle workers now and then against slow leaks, not all at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+
+
+LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def check_shared_cache(workers):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    from django.conf import settings
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if workers > 1 and backend in LOCAL_CACHES:
+        raise RuntimeError(
+            f"{workers} workers cannot share the {backend} cache, set "
+            "CACHE_BACKEND and CACHE_LOCATION to a shared cache or "
+            "GUNICORN_WORKERS=1."
+        )
+
+
+def on_starting(server):
+    check_shared_cache(server.cfg.workers)
+
+
+def post_fork(server, worker):
+    """The master may have connected while loading the application,
+    those connections must not be shared by the workers."""
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.connection = None
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.middleware import gzip
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """Compress responses from ``GZIP_MIN_LENGTH`` bytes. Smaller ones
+    fit in a packet or two, compressing them costs more CPU than it
+    saves transfer time. Streaming responses are always compressed."""
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.GZIP_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
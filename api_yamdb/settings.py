@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 # from dotenv import load_dotenv
@@ -30,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_v1.metrics.request_metrics_middleware',
+    'api_yamdb.middleware.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +42,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Smaller responses are sent uncompressed.
+GZIP_MIN_LENGTH = int(os.environ.get('GZIP_MIN_LENGTH', default=1024))
+
+# Requests over any of the limits are logged with their SQL.
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', default=500))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', default=50))
+SLOW_REQUEST_DUPLICATES = int(os.environ.get('SLOW_REQUEST_DUPLICATES', default=10))
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -68,8 +79,45 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.environ.get('DB_HOST', default='db'),
         'PORT': os.environ.get('DB_PORT', default='5432'),
+        # Seconds a connection is reused for, use 0 with the pool
+        # engine api_yamdb.db.pool, which keeps POOL_SIZE idle ones.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', default=60)),
+        'POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', default=10)),
     }
 }
+# Ping a reused connection idle for longer than this many seconds.
+DB_HEALTH_CHECK_INTERVAL = int(os.environ.get('DB_HEALTH_CHECK_INTERVAL', default=30))
+
+# Read replicas, comma-separated hosts (database files with SQLite).
+# Safe requests of the API viewsets read from them in turn, see
+# api_yamdb.db.router.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', default='').split(',')), 1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME' if 'sqlite3' in DATABASES['default']['ENGINE'] else 'HOST': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+# Seconds the reads of a user stay on the primary after a write.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', default=5))
+# Seconds a replica is trusted, or skipped, after a ping.
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL', default=5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default=''),
+    }
+}
+
+# Cache of the read-only catalogue responses, 0 disables it.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', default=300))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,22 +146,55 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'api_yamdb', 'static')]
+# Hashed names and .gz/.br variants for nginx, see api_yamdb/storage.py.
+STATICFILES_STORAGE = 'api_yamdb.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Serve the API with async views, set by api_yamdb/asgi.py. The sync
+# views run in a pool of ASYNC_VIEW_THREADS threads per process.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', default='') == '1'
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', default=16))
+
+# Build the titles, reviews and comments lists from .values() rows
+# instead of the serializers, the JSON is the same.
+FAST_LISTS = os.environ.get('FAST_LISTS', default='1') == '1'
+
+# Review scores count half as much in the trending ranking every
+# TRENDING_HALF_LIFE_DAYS.
+TRENDING_HALF_LIFE_DAYS = float(os.environ.get('TRENDING_HALF_LIFE_DAYS', default=7))
+
+# Counters of the throttles: sqlite:///path, redis://host:port/db or cache.
+# The SQLite file is shared by the workers of a host, the default
+# locmem cache would count per process.
+THROTTLE_STORE = os.environ.get(
+    'THROTTLE_STORE',
+    default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'yamdb_throttle.sqlite3'),
+)
+
+# Authenticate safe requests from the token claims, without a user query.
+JWT_STATELESS_AUTH = os.environ.get('JWT_STATELESS_AUTH', default='') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api_v1.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api_v1.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle'
+        'api_v1.throttling.UserFixedWindowThrottle',
+        'api_v1.throttling.AnonFixedWindowThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '100/minute',
@@ -0,0 +1,80 @@
+"""Static files with hashed names and precompressed variants.
+
+``collectstatic`` writes a ``.gz`` copy of every text file, and a
+``.br`` copy when the brotli package is installed, next to both the
+original and the hashed file. nginx serves them with ``gzip_static``
+instead of compressing on every request. The hashed names never change
+content, nginx caches them for a year.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_EXTENSIONS = {
+    ".css", ".html", ".js", ".json", ".map", ".svg", ".txt", ".xml",
+    ".yaml", ".yml", ".eot", ".otf", ".ttf",
+}
+COMPRESS_MIN_SIZE = 1024
+
+
+def gzip_compress(content):
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def compressors():
+    yield ".gz", gzip_compress
+    if brotli is not None:
+        yield ".br", brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        """The original name for files not collected yet, as without
+        hashing, instead of an error."""
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for path in {self.path(name), self.path(hashed_name)}:
+                if self.should_compress(path):
+                    self.compress(path)
+
+    @staticmethod
+    def should_compress(path):
+        return (
+            os.path.splitext(path)[1].lower() in COMPRESS_EXTENSIONS
+            and os.path.getsize(path) >= COMPRESS_MIN_SIZE
+        )
+
+    @staticmethod
+    def compress(path):
+        """Write the variants that are smaller than the file and older
+        than it or missing."""
+        modified = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            content = f.read()
+        for suffix, compress in compressors():
+            target = path + suffix
+            if (
+                os.path.exists(target)
+                and os.path.getmtime(target) >= modified
+            ):
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                with open(target, "wb") as f:
+                    f.write(compressed)
@@ -0,0 +1,8 @@
+from django.urls import include, path
+
+from api_v1 import urls
+from api_v1.async_views import async_patterns
+
+urlpatterns = [
+    path('api/v1/', include(async_patterns(urls.urlpatterns))),
+]
@@ -0,0 +1,90 @@
+"""Benchmarks are opt-in: ``YAMDB_BENCH=1 pytest tests/benchmarks``.
+
+YAMDB_BENCH_SCALE     fraction of the production-like dataset to seed (0.001)
+YAMDB_BENCH_ROUNDS    timed calls per case (30)
+YAMDB_BENCH_OUTPUT    JSON file the results are written to (bench_output.json)
+YAMDB_BENCH_BASELINE  JSON of a previous run to compare with
+YAMDB_BENCH_TOLERANCE allowed p95 slowdown against the baseline (0.25)
+"""
+import json
+import os
+
+import pytest
+from rest_framework.views import APIView
+
+from tests.benchmarks.seed import drop_dataset, seed_dataset
+from tests.benchmarks.timing import measure
+
+ENABLED = bool(os.environ.get('YAMDB_BENCH'))
+SCALE = float(os.environ.get('YAMDB_BENCH_SCALE', '0.001'))
+ROUNDS = int(os.environ.get('YAMDB_BENCH_ROUNDS', '30'))
+OUTPUT = os.environ.get('YAMDB_BENCH_OUTPUT', 'bench_output.json')
+BASELINE = os.environ.get('YAMDB_BENCH_BASELINE')
+TOLERANCE = float(os.environ.get('YAMDB_BENCH_TOLERANCE', '0.25'))
+
+
+def pytest_collection_modifyitems(config, items):
+    if ENABLED:
+        return
+    skip = pytest.mark.skip(reason='set YAMDB_BENCH=1 to run benchmarks')
+    for item in items:
+        if 'benchmarks' in item.nodeid.split('/'):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def bench_dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        size = seed_dataset(SCALE)
+    yield size
+    with django_db_blocker.unblock():
+        drop_dataset()
+
+
+@pytest.fixture(scope='session')
+def bench_report(bench_dataset):
+    baseline = {}
+    if BASELINE:
+        with open(BASELINE, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    report = {'scale': SCALE, 'dataset': bench_dataset, 'results': {}}
+    yield report, baseline
+    with open(OUTPUT, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    # Cache hits cost no query, they would hide regressions of the
+    # views. Cases measuring the cache turn it back on.
+    settings.API_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(monkeypatch):
+    # Function views copy throttle_classes when they are decorated.
+    monkeypatch.setattr(APIView, 'get_throttles', lambda view: [])
+
+
+@pytest.fixture
+def benchmark(bench_report, db):
+    """Measure a callable, record it in the report and compare it
+    with the baseline run if one was given.
+    """
+    report, baseline = bench_report
+
+    def run(name, func, prepare=None, rounds=ROUNDS):
+        stats = measure(func, rounds, prepare=prepare)
+        report['results'][name] = stats
+        previous = baseline.get(name)
+        if previous:
+            assert stats['queries'] <= previous['queries'], (
+                f'{name}: {stats["queries"]} SQL-запросов против {previous["queries"]} в базовом прогоне'
+            )
+            limit = previous['p95_ms'] * (1 + TOLERANCE)
+            assert stats['p95_ms'] <= limit, (
+                f'{name}: p95 {stats["p95_ms"]} мс больше допустимых {limit:.3f} мс'
+            )
+        return stats
+
+    return run
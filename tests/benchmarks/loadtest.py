@@ -0,0 +1,89 @@
+"""Requests per second of a running server, e.g. before and after a
+change of the gunicorn or database settings:
+
+    python -m tests.benchmarks.loadtest http://localhost/api/v1/titles/ \
+        --concurrency 16 --duration 30 --label pooled --output load.json
+
+Every run is appended to the output file, so runs can be compared.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from tests.benchmarks.timing import percentile
+
+
+def worker(url, deadline, headers, latencies, errors):
+    request = urllib.request.Request(url, headers=headers)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except (urllib.error.URLError, OSError):
+            errors.append(1)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run(url, concurrency, duration, headers):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=worker, args=(url, deadline, headers, latencies, errors)
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--token', help='JWT access token to send.')
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--output', default='loadtest.json')
+    args = parser.parse_args()
+
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Bearer {args.token}'
+    result = run(args.url, args.concurrency, args.duration, headers)
+    result['label'] = args.label
+
+    runs = []
+    if os.path.exists(args.output):
+        with open(args.output, encoding='utf-8') as f:
+            runs = json.load(f)
+    runs.append(result)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(runs, f, indent=2)
+    for previous in runs:
+        print(f"{previous['label']:>12}: {previous['rps']:8.1f} req/s  "
+              f"p50 {previous['p50_ms']} ms  p95 {previous['p95_ms']} ms  "
+              f"errors {previous['errors']}")
+
+
+if __name__ == '__main__':
+    main()
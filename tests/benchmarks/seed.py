@@ -0,0 +1,103 @@
+"""Synthetic dataset for the benchmarks.
+
+Sizes are the production-like volumes multiplied by ``scale``.
+"""
+import io
+import random
+
+from django.core.management import call_command
+
+FULL_SIZE = {
+    'titles': 100_000,
+    'reviews': 1_000_000,
+    'comments': 5_000_000,
+}
+CATEGORIES = 10
+GENRES = 30
+GENRES_PER_TITLE = 3
+BATCH_SIZE = 5_000
+
+
+def dataset_size(scale):
+    return {name: max(1, int(amount * scale)) for name, amount in FULL_SIZE.items()}
+
+
+def seed_dataset(scale, seed=0):
+    from api_v1.models import (Category, Comment, CustomUser, Genre, Review,
+                               Title, Title2Genre)
+
+    size = dataset_size(scale)
+    rnd = random.Random(seed)
+    reviews_per_title = max(1, size['reviews'] // size['titles'])
+
+    # Every review of a title needs its own author.
+    CustomUser.objects.bulk_create(
+        CustomUser(
+            username=f'bench_user_{i}', email=f'bench_user_{i}@yamdb.fake',
+            password='!', role='user',
+        )
+        for i in range(max(reviews_per_title, 20))
+    )
+    users = list(CustomUser.objects.filter(username__startswith='bench_user_'))
+    Category.objects.bulk_create(
+        Category(name=f'Category {i}', slug=f'category-{i}') for i in range(CATEGORIES)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Genre {i}', slug=f'genre-{i}') for i in range(GENRES)
+    )
+    categories = list(Category.objects.all())
+    genres = list(Genre.objects.all())
+
+    Title.objects.bulk_create(
+        (
+            Title(
+                name=f'Title {i}', year=1900 + i % 120,
+                description=f'Description {i}', category=rnd.choice(categories),
+            )
+            for i in range(size['titles'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    title_ids = list(Title.objects.values_list('id', flat=True))
+    Title2Genre.objects.bulk_create(
+        (
+            Title2Genre(title_id=title_id, genre=genre)
+            for title_id in title_ids
+            for genre in rnd.sample(genres, GENRES_PER_TITLE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Review.objects.bulk_create(
+        (
+            Review(
+                title_id=title_ids[i // reviews_per_title % len(title_ids)],
+                author=users[i % reviews_per_title],
+                text=f'Review {i}', score=rnd.randint(1, 10),
+            )
+            for i in range(size['reviews'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    review_ids = list(Review.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                review_id=rnd.choice(review_ids), author=rnd.choice(users),
+                text=f'Comment {i}',
+            )
+            for i in range(size['comments'])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    call_command('rebuild_ratings', stdout=io.StringIO())
+    call_command('rebuild_rankings', stdout=io.StringIO())
+    return size
+
+
+def drop_dataset():
+    from api_v1.models import Category, CustomUser, Genre, Title
+
+    Title.objects.all().delete()
+    Category.objects.all().delete()
+    Genre.objects.all().delete()
+    CustomUser.objects.all().delete()
@@ -0,0 +1,266 @@
+"""Latency and SQL query count of every route in api_v1/urls.py.
+
+The cacheable reads run without the response cache, the ``_cached``
+cases measure its hits separately.
+"""
+from types import SimpleNamespace
+
+import pytest
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api_v1.models import Category, Comment, CustomUser, Genre, Review, Title
+from tests.fixtures.fixture_user import _client_for
+
+
+@pytest.fixture
+def ctx(bench_dataset, user, admin, client):
+    review = Review.objects.order_by('id').first()
+    title = Title.objects.get(pk=review.title_id)
+    comment = Comment.objects.order_by('id').first()
+    reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+    return SimpleNamespace(
+        anon=client,
+        user=user,
+        user_client=_client_for(user),
+        admin_client=_client_for(admin),
+        title=title,
+        reviews_url=reviews_url,
+        review_url=f'{reviews_url}{review.id}/',
+        comments_url=f'{reviews_url}{review.id}/comments/',
+        comment_url=f'/api/v1/titles/{comment.review.title_id}/reviews/'
+                    f'{comment.review_id}/comments/{comment.id}/',
+        bench_user=CustomUser.objects.filter(username__startswith='bench_user_').first(),
+    )
+
+
+def get(client, url):
+    def call():
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+    return call
+
+
+def titles_list(ctx):
+    return get(ctx.anon, '/api/v1/titles/'), None
+
+
+def titles_filter_genre(ctx):
+    return get(ctx.anon, '/api/v1/titles/?genre=genre-1'), None
+
+
+def titles_filter_category(ctx):
+    return get(ctx.anon, '/api/v1/titles/?category=category-1'), None
+
+
+def titles_filter_year(ctx):
+    return get(ctx.anon, '/api/v1/titles/?year=1950'), None
+
+
+def titles_filter_name(ctx):
+    return get(ctx.anon, '/api/v1/titles/?name=Title 1'), None
+
+
+def titles_by_rating(ctx):
+    return get(ctx.anon, '/api/v1/titles/?ordering=-rating'), None
+
+
+def titles_top(ctx):
+    return get(ctx.anon, '/api/v1/titles/top?genre=genre-1'), None
+
+
+def titles_trending(ctx):
+    return get(ctx.anon, '/api/v1/titles/top?by=trending'), None
+
+
+def title_detail(ctx):
+    return get(ctx.anon, f'/api/v1/titles/{ctx.title.id}/'), None
+
+
+def title_create(ctx):
+    def call():
+        response = ctx.admin_client.post(
+            '/api/v1/titles/',
+            data={'name': 'Bench', 'year': 2000, 'category': 'category-1', 'genre': ['genre-1']},
+        )
+        assert response.status_code == 201, response.content
+    return call, None
+
+
+def reviews_list(ctx):
+    return get(ctx.anon, ctx.reviews_url), None
+
+
+def review_detail(ctx):
+    return get(ctx.anon, ctx.review_url), None
+
+
+def review_create(ctx):
+    def prepare():
+        Review.objects.filter(author=ctx.user, title=ctx.title).delete()
+
+    def call():
+        response = ctx.user_client.post(ctx.reviews_url, data={'text': 'Bench', 'score': 7})
+        assert response.status_code == 201, response.content
+    return call, prepare
+
+
+def review_patch(ctx):
+    def call():
+        response = ctx.admin_client.patch(ctx.review_url, data={'score': 5})
+        assert response.status_code == 200, response.content
+    return call, None
+
+
+def comments_list(ctx):
+    return get(ctx.anon, ctx.comments_url), None
+
+
+def comment_detail(ctx):
+    return get(ctx.anon, ctx.comment_url), None
+
+
+def comment_create(ctx):
+    def call():
+        response = ctx.user_client.post(ctx.comments_url, data={'text': 'Bench'})
+        assert response.status_code == 201, response.content
+    return call, None
+
+
+def categories_list(ctx):
+    return get(ctx.anon, '/api/v1/categories/'), None
+
+
+def category_delete(ctx):
+    def prepare():
+        Category.objects.create(name='Bench category', slug='bench-category')
+
+    def call():
+        response = ctx.admin_client.delete('/api/v1/categories/bench-category/')
+        assert response.status_code == 204, response.content
+    return call, prepare
+
+
+def genres_list(ctx):
+    return get(ctx.anon, '/api/v1/genres/'), None
+
+
+def genre_delete(ctx):
+    def prepare():
+        Genre.objects.create(name='Bench genre', slug='bench-genre')
+
+    def call():
+        response = ctx.admin_client.delete('/api/v1/genres/bench-genre/')
+        assert response.status_code == 204, response.content
+    return call, prepare
+
+
+def users_list(ctx):
+    return get(ctx.admin_client, '/api/v1/users/'), None
+
+
+def user_detail(ctx):
+    return get(ctx.admin_client, f'/api/v1/users/{ctx.bench_user.username}/'), None
+
+
+def users_me(ctx):
+    return get(ctx.user_client, '/api/v1/users/me/'), None
+
+
+def auth_email(ctx):
+    def call():
+        response = ctx.anon.post('/api/v1/auth/email', data={'email': ctx.user.email})
+        assert response.status_code == 200, response.content
+    return call, None
+
+
+def auth_token(ctx):
+    def prepare():
+        CustomUser.objects.filter(pk=ctx.user.pk).update(confirmation_code='bench-code')
+
+    def call():
+        response = ctx.anon.post(
+            '/api/v1/auth/token', data={'email': ctx.user.email, 'confirmation_code': 'bench-code'}
+        )
+        assert response.status_code == 200, response.content
+    return call, prepare
+
+
+def search_titles(ctx):
+    return get(ctx.anon, '/api/v1/search/?q=Title 1'), None
+
+
+def search_reviews(ctx):
+    return get(ctx.anon, '/api/v1/search/?q=review&type=reviews'), None
+
+
+def changes_feed(ctx):
+    return get(ctx.anon, '/api/v1/changes/?since=0'), None
+
+
+def export_titles(ctx):
+    def call():
+        response = ctx.admin_client.get('/api/v1/export/titles.csv')
+        assert response.status_code == 200
+        b''.join(response.streaming_content)
+    return call, None
+
+
+def titles_bulk(ctx):
+    items = [
+        {'name': f'Bench {i}', 'year': 2000, 'category': 'category-1', 'genre': ['genre-1']}
+        for i in range(10)
+    ]
+
+    def call():
+        response = ctx.admin_client.post('/api/v1/titles/bulk', data=items, format='json')
+        assert response.status_code == 201, response.content
+    return call, None
+
+
+def metrics(ctx):
+    return get(ctx.admin_client, '/api/v1/metrics/'), None
+
+
+def cache_stats(ctx):
+    return get(ctx.admin_client, '/api/v1/cache/stats/'), None
+
+
+def token_refresh(ctx):
+    refresh = str(RefreshToken.for_user(ctx.user))
+
+    def call():
+        response = ctx.anon.post('/api/v1/token/refresh', data={'refresh': refresh})
+        assert response.status_code == 200, response.content
+    return call, None
+
+
+def cached(case):
+    """The case with the response cache on, its calls after the first
+    are hits."""
+    def cached_case(ctx):
+        return case(ctx)
+    cached_case.__name__ = f'{case.__name__}_cached'
+    cached_case.cached = True
+    return cached_case
+
+
+CASES = [
+    titles_list, titles_filter_genre, titles_filter_category, titles_filter_year,
+    titles_filter_name, titles_by_rating, titles_top, titles_trending,
+    title_detail, title_create, titles_bulk,
+    reviews_list, review_detail, review_create, review_patch,
+    comments_list, comment_detail, comment_create,
+    categories_list, category_delete, genres_list, genre_delete,
+    users_list, user_detail, users_me, auth_email, auth_token, token_refresh,
+    search_titles, search_reviews, changes_feed, export_titles, metrics, cache_stats,
+    cached(titles_list), cached(title_detail), cached(titles_top),
+    cached(categories_list), cached(genres_list),
+]
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case.__name__ for case in CASES])
+def test_endpoint(case, ctx, benchmark, settings):
+    if getattr(case, 'cached', False):
+        settings.API_CACHE_TIMEOUT = 300
+    call, prepare = case(ctx)
+    benchmark(case.__name__, call, prepare=prepare)
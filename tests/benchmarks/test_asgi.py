@@ -0,0 +1,69 @@
+"""The titles list served by Django's WSGIHandler against the ASGI
+application of api_yamdb/asgi.py, in process: a request alone and
+CONCURRENCY requests at once, threads for WSGI as gthread workers run
+them, one event loop for ASGI. No server or network is involved, run
+tests/benchmarks/loadtest.py against gunicorn for end-to-end figures.
+Queries are only counted on the calling thread, not in the pools.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory, override_settings
+
+from api_v1.async_views import StreamingASGIHandler
+
+URL = '/api/v1/titles/'
+CONCURRENCY = 16
+
+
+@pytest.fixture
+def async_urls():
+    with override_settings(ROOT_URLCONF='tests.async_urls'):
+        yield
+
+
+def wsgi_get():
+    status = []
+    environ = RequestFactory()._base_environ(PATH_INFO=URL, REQUEST_METHOD='GET')
+    body = b''.join(WSGIHandler()(environ, lambda code, headers: status.append(code)))
+    assert status[0].startswith('200'), body
+
+
+async def asgi_get(handler):
+    messages = []
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': URL, 'raw_path': URL.encode(), 'query_string': b'', 'root_path': '',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000), 'headers': [(b'host', b'testserver')],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler(scope, receive, send)
+    assert messages[0]['status'] == 200
+
+
+def test_wsgi(bench_dataset, benchmark):
+    benchmark('wsgi_titles_list', wsgi_get)
+
+    def concurrent():
+        with ThreadPoolExecutor(CONCURRENCY) as pool:
+            for future in [pool.submit(wsgi_get) for _ in range(CONCURRENCY)]:
+                future.result()
+    benchmark(f'wsgi_titles_list_x{CONCURRENCY}', concurrent, rounds=10)
+
+
+def test_asgi(bench_dataset, benchmark, async_urls):
+    handler = StreamingASGIHandler()
+    benchmark('asgi_titles_list', lambda: async_to_sync(asgi_get)(handler))
+
+    async def concurrent():
+        await asyncio.gather(*(asgi_get(handler) for _ in range(CONCURRENCY)))
+    benchmark(f'asgi_titles_list_x{CONCURRENCY}', async_to_sync(concurrent), rounds=10)
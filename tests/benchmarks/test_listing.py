@@ -0,0 +1,42 @@
+"""Serialization of 1000-row list pages, serializers against the
+fast lists of api_v1.listing."""
+import pytest
+
+from api_v1.listing import CommentList, ReviewList, TitleList
+from api_v1.models import Comment, Review
+from api_v1.serializers import (CommentSerializer, ReviewSerializer,
+                                TitleSerializerList)
+from api_v1.views import TitleViewSet
+
+PAGE_ROWS = 1000
+
+CASES = {
+    'titles': (TitleViewSet.queryset, TitleSerializerList, TitleList),
+    'reviews': (Review.objects.all(), ReviewSerializer, ReviewList),
+    'comments': (Comment.objects.all(), CommentSerializer, CommentList),
+}
+
+
+def serializer_page(queryset, serializer_class):
+    def call():
+        return serializer_class(queryset[:PAGE_ROWS], many=True).data
+    return call
+
+
+def fast_page(queryset, fast_list_class):
+    fast_list = fast_list_class()
+
+    def call():
+        return fast_list.represent(fast_list.values(queryset)[:PAGE_ROWS])
+    return call
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_page_serialization(name, benchmark):
+    queryset, serializer_class, fast_list_class = CASES[name]
+    queryset = queryset.order_by('pk')
+    assert serializer_page(queryset, serializer_class)() == fast_page(queryset, fast_list_class)()
+
+    benchmark(f'serialize_{name}_x{PAGE_ROWS}', serializer_page(queryset, serializer_class))
+    stats = benchmark(f'serialize_{name}_fast_x{PAGE_ROWS}', fast_page(queryset, fast_list_class))
+    assert stats['queries'] <= 2, 'Проверьте, что быстрый список не делает запросов на строку'
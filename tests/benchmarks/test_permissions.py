@@ -0,0 +1,44 @@
+"""Per-request cost of the permission checks, without the DB."""
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api_v1.models import Review
+from api_v1.views import ReviewViewSet, TitleViewSet
+
+CHECKS_PER_CALL = 1000
+
+
+@pytest.fixture
+def review(bench_dataset, db):
+    return Review.objects.order_by('pk').first()
+
+
+def check(viewset, method, user, obj=None):
+    view = viewset(action='partial_update' if obj is not None else 'create')
+    request = Request(getattr(APIRequestFactory(), method)('/'))
+    request.user = user
+    view.request = request
+
+    def call():
+        for _ in range(CHECKS_PER_CALL):
+            view.check_permissions(request)
+            if obj is not None:
+                view.check_object_permissions(request, obj)
+    return call
+
+
+@pytest.mark.parametrize('method', ['get', 'post'])
+def test_title_permissions(method, admin, benchmark):
+    stats = benchmark(f'permissions_titles_{method}_x{CHECKS_PER_CALL}', check(TitleViewSet, method, admin))
+    assert stats['queries'] == 0
+
+
+@pytest.mark.parametrize('who', ['author', 'admin'])
+def test_review_owner_permissions(who, review, admin, benchmark):
+    user = review.author if who == 'author' else admin
+    review = Review.objects.get(pk=review.pk)
+    stats = benchmark(
+        f'permissions_review_{who}_x{CHECKS_PER_CALL}', check(ReviewViewSet, 'patch', user, review)
+    )
+    assert stats['queries'] == 0, 'Проверьте, что проверка автора не загружает пользователя'
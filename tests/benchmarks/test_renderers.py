@@ -0,0 +1,46 @@
+"""Render time and size of a 500-title page, DRF's JSONRenderer
+against api_v1.renderers.FastJSONRenderer."""
+from itertools import cycle, islice
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api_v1.renderers import FastJSONRenderer
+from api_v1.serializers import TitleSerializerList
+from api_v1.views import TitleViewSet
+
+PAGE_ROWS = 500
+RENDERS_PER_CALL = 10
+
+
+class AsciiJSONRenderer(JSONRenderer):
+    ensure_ascii = True
+
+
+@pytest.fixture
+def page(bench_dataset, db):
+    titles = TitleSerializerList(TitleViewSet.queryset[:PAGE_ROWS], many=True).data
+    results = []
+    # Smaller datasets repeat their titles, with Russian text as in data/*.csv.
+    for number, title in enumerate(islice(cycle(titles), PAGE_ROWS)):
+        results.append(dict(
+            title, id=number + 1, name=f'Произведение {number}',
+            description='Описание произведения на русском языке',
+        ))
+    return {'count': PAGE_ROWS, 'next': None, 'previous': None, 'results': results}
+
+
+@pytest.mark.parametrize('renderer_class', [AsciiJSONRenderer, JSONRenderer, FastJSONRenderer])
+def test_render_title_page(renderer_class, page, benchmark):
+    renderer = renderer_class()
+
+    def call():
+        for _ in range(RENDERS_PER_CALL):
+            renderer.render(page)
+
+    stats = benchmark(
+        f'render_titles_x{PAGE_ROWS}_{renderer_class.__name__}_x{RENDERS_PER_CALL}', call
+    )
+    stats['bytes'] = len(renderer.render(page))
+    if renderer_class is FastJSONRenderer:
+        assert renderer.render(page) == JSONRenderer().render(page)
@@ -0,0 +1,42 @@
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def measure(func, rounds, prepare=None, warmup=2):
+    """Call ``func`` ``rounds`` times and return latency and SQL statistics.
+
+    ``prepare`` runs before every call and is excluded from the figures.
+    """
+    for _ in range(warmup):
+        if prepare is not None:
+            prepare()
+        func()
+
+    latencies = []
+    queries = []
+    for _ in range(rounds):
+        if prepare is not None:
+            prepare()
+        # The query log is bounded, once full it hides the new queries.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+
+    return {
+        'rounds': rounds,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'queries': max(queries),
+    }
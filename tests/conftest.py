@@ -1,9 +1,23 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Throttling counters live in the cache, reset them for every test."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
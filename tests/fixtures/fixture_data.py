@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from api_v1.models import Category
+
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from api_v1.models import Genre
+
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from api_v1.models import Title, Title2Genre
+
+    title = Title.objects.create(name='Побег из Шоушенка', year=1994, category=category)
+    for genre in genres:
+        Title2Genre.objects.create(title=title, genre=genre)
+    return title
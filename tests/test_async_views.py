@@ -0,0 +1,134 @@
+import asyncio
+import re
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import resolve
+
+from api_v1.async_views import (StreamingASGIHandler, get_executor,
+                                iterate_in_thread)
+
+
+async def call(client, method, *args, **kwargs):
+    return await getattr(client, method)(*args, **kwargs)
+
+
+def request(client, method, *args, **kwargs):
+    return async_to_sync(call)(client, method, *args, **kwargs)
+
+
+def asgi_get(path, headers=()):
+    """GET through a StreamingASGIHandler as an ASGI server would."""
+    messages = []
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    with override_settings(ROOT_URLCONF='tests.async_urls'):
+        async_to_sync(StreamingASGIHandler())(scope, receive, send)
+    return messages
+
+
+@pytest.fixture
+def async_client():
+    with override_settings(ROOT_URLCONF='tests.async_urls'):
+        yield AsyncClient()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+
+    def test_views_are_async(self, async_client):
+        for url in ('/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/', '/api/v1/titles/1/reviews/'):
+            assert asyncio.iscoroutinefunction(resolve(url, 'tests.async_urls').func), url
+
+    def test_catalogue_reads(self, async_client, title):
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.id}/', '/api/v1/genres/', '/api/v1/categories/',
+                    f'/api/v1/titles/{title.id}/reviews/'):
+            response = request(async_client, 'get', url)
+            assert response.status_code == 200, (url, response.content)
+        assert response.json()['count'] == 0
+
+    def test_queries_of_pool_threads_are_measured(self, async_client, title):
+        response = request(async_client, 'get', f'/api/v1/titles/{title.id}/reviews/')
+        queries = int(re.search(r'"(\d+) queries"', response['Server-Timing']).group(1))
+        assert queries > 0, 'Проверьте, что запросы из пула потоков попадают в метрики'
+
+    def test_writes(self, async_client, admin):
+        from tests.fixtures.fixture_user import _client_for
+
+        token = _client_for(admin)._credentials['HTTP_AUTHORIZATION']
+        response = request(
+            async_client, 'post', '/api/v1/genres/', {'name': 'Ужасы', 'slug': 'horror'},
+            content_type='application/json', AUTHORIZATION=token
+        )
+        assert response.status_code == 201, response.content
+
+    def test_pool_is_bounded(self, settings):
+        assert get_executor()._max_workers == settings.ASYNC_VIEW_THREADS
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStreamingThroughASGIHandler:
+
+    def test_export_is_streamed(self, admin, title):
+        from tests.fixtures.fixture_user import _client_for
+
+        token = _client_for(admin)._credentials['HTTP_AUTHORIZATION']
+        messages = asgi_get('/api/v1/export/titles.csv', [(b'authorization', token.encode())])
+        assert messages[0]['status'] == 200
+        body = b''.join(message.get('body', b'') for message in messages[1:]).decode()
+        assert body.splitlines()[1].startswith(f'{title.id},'), (
+            'Проверьте, что выгрузка отдаётся целиком через ASGI'
+        )
+        assert messages[-1] == {'type': 'http.response.body'}
+
+    def test_regular_responses(self, title):
+        messages = asgi_get(f'/api/v1/titles/{title.id}/')
+        assert messages[0]['status'] == 200
+        assert b'"id":%d' % title.id in messages[1]['body']
+
+    def test_application_is_the_streaming_handler(self):
+        from api_yamdb import asgi
+
+        assert isinstance(asgi.application, StreamingASGIHandler)
+
+
+def test_producer_stops_with_the_client():
+    produced = []
+
+    def parts():
+        for number in range(1000):
+            produced.append(number)
+            yield b'x'
+
+    class Response:
+        def __iter__(self):
+            return parts()
+
+        def close(self):
+            produced.append('closed')
+
+    async def first_part():
+        async for part in iterate_in_thread(Response()):
+            return part
+
+    assert async_to_sync(first_part)() == b'x'
+    for _ in range(100):
+        if produced[-1:] == ['closed']:
+            break
+        time.sleep(0.01)
+    assert produced[-1] == 'closed' and len(produced) < 100, (
+        'Проверьте, что поток выгрузки останавливается, когда клиент отключился'
+    )
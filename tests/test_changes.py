@@ -0,0 +1,202 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+
+from api_v1 import changes
+from api_v1.models import ChangeLogEntry, Comment, Review, Title
+
+URL = '/api/v1/changes/'
+
+
+def feed(client, since=0, **params):
+    response = client.get(URL, {'since': since, **params})
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def summary(results):
+    return [(change['type'], change['id'], change['action']) for change in results]
+
+
+# Entries are numbered once their transaction commits.
+@pytest.mark.django_db(transaction=True)
+class TestChangesFeed:
+
+    def test_writes_are_logged(self, client, user_client, title):
+        start = feed(client)
+        assert summary(start['results']) == [('title', title.id, 'update')], (
+            'Проверьте, что в ленте остаётся последнее изменение объекта'
+        )
+        assert start['results'][0]['data'] == client.get(f'/api/v1/titles/{title.id}/').json()
+
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(reviews_url, data={'text': 'Отзыв', 'score': 8}).json()
+        page = feed(client, start['since'])
+        assert summary(page['results']) == [
+            ('review', review['id'], 'create'), ('title', title.id, 'update'),
+        ]
+        assert page['results'][0]['data'] == review
+        assert page['results'][1]['data']['rating'] == 8
+
+        user_client.patch(f'{reviews_url}{review["id"]}/', data={'score': 2})
+        page = feed(client, page['since'])
+        assert summary(page['results']) == [
+            ('review', review['id'], 'update'), ('title', title.id, 'update'),
+        ]
+        assert page['results'][1]['data']['rating'] == 2
+
+        user_client.delete(f'{reviews_url}{review["id"]}/')
+        page = feed(client, page['since'])
+        assert summary(page['results']) == [
+            ('review', review['id'], 'delete'), ('title', title.id, 'update'),
+        ]
+        assert 'data' not in page['results'][0], 'Проверьте, что удаление передаётся без данных'
+        assert page['results'][1]['data']['rating'] is None
+
+        assert feed(client, page['since']) == {'since': page['since'], 'next': None, 'results': []}
+
+    def test_cascades_leave_tombstones(self, client, title, user):
+        review = Review.objects.create(title=title, author=user, text='-', score=5)
+        comment = Comment.objects.create(review=review, author=user, text='-')
+        since, title_id = feed(client)['since'], title.id
+        title.delete()
+        assert summary(feed(client, since)['results']) == [
+            ('comment', comment.id, 'delete'),
+            ('review', review.id, 'delete'),
+            ('title', title_id, 'delete'),
+        ]
+
+    def test_keyset_pages(self, client, category):
+        for number in range(5):
+            Title.objects.create(name=f'Произведение {number}', category=category)
+        seen, url = [], f'{URL}?since=0&limit=2'
+        while url:
+            page = client.get(url).json()
+            assert len(page['results']) <= 2
+            seen += summary(page['results'])
+            url = page['next']
+        assert [change[1] for change in seen] == list(
+            Title.objects.order_by('id').values_list('id', flat=True)
+        )
+
+    def test_object_deleted_after_the_page(self, client, title):
+        since, title_id = feed(client)['since'], title.id
+        title.name = 'Новое название'
+        title.save()
+        title.delete()
+        first = feed(client, since, limit=1)
+        assert summary(first['results']) == [('title', title_id, 'delete')], (
+            'Проверьте, что изменение удалённого объекта передаётся как удаление'
+        )
+
+    def test_category_and_genre_changes_update_titles(self, client, admin_client, title, category, genres):
+        genre = genres[0]
+        since = feed(client)['since']
+        category.save()
+        genre.save()
+        assert feed(client, since)['results'] == [], 'Сохранение без изменений не попадает в ленту'
+
+        genre.name = 'Новый жанр'
+        genre.save()
+        page = feed(client, since)
+        assert summary(page['results']) == [('title', title.id, 'update')], (
+            'Проверьте, что переименование жанра попадает в ленту как изменение произведений'
+        )
+        assert 'Новый жанр' in [item['name'] for item in page['results'][0]['data']['genre']]
+
+        category.name = 'Новая категория'
+        category.save()
+        page = feed(client, page['since'])
+        assert summary(page['results']) == [('title', title.id, 'update')]
+        assert page['results'][0]['data']['category']['name'] == 'Новая категория'
+
+        response = admin_client.delete(f'/api/v1/categories/{category.slug}/')
+        assert response.status_code == 204, response.content
+        page = feed(client, page['since'])
+        assert summary(page['results']) == [('title', title.id, 'update')], (
+            'Проверьте, что удаление категории попадает в ленту как изменение произведений'
+        )
+        assert page['results'][0]['data']['category'] is None
+
+        genre.delete()
+        page = feed(client, page['since'])
+        assert summary(page['results']) == [('title', title.id, 'update')]
+        assert [item['slug'] for item in page['results'][0]['data']['genre']] == ['comedy']
+
+    def test_rebuild_ratings_logs_the_titles_it_changes(self, client, title, category, user):
+        other = Title.objects.create(name='Без изменений', category=category)
+        Review.objects.bulk_create([Review(title=title, author=user, text='-', score=6)])
+        since = feed(client)['since']
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        page = feed(client, since)
+        assert summary(page['results']) == [('title', title.id, 'update')], (
+            'Проверьте, что rebuild_ratings отмечает в ленте изменённые рейтинги'
+        )
+        assert page['results'][0]['data']['rating'] == 6
+        assert other.id not in [change['id'] for change in page['results']]
+
+    def test_filter_by_type(self, client, title, user):
+        review = Review.objects.create(title=title, author=user, text='-', score=5)
+        assert summary(feed(client, type='review')['results']) == [('review', review.id, 'create')]
+
+    def test_entries_wait_for_the_commit(self, client, category):
+        since = feed(client)['since']
+        with transaction.atomic():
+            title = Title.objects.create(name='Новинка', category=category)
+            assert feed(client, since)['results'] == [], (
+                'Проверьте, что изменения не попадают в ленту до фиксации транзакции'
+            )
+        assert summary(feed(client, since)['results']) == [('title', title.id, 'create')]
+
+    def test_late_commit_comes_after_since(self, client, title):
+        since = feed(client)['since']
+        # Logged before the title was, by a transaction committing now.
+        ChangeLogEntry.objects.create(
+            id=0, kind=ChangeLogEntry.TITLE, object_id=title.id, action=ChangeLogEntry.UPDATE
+        )
+        changes.publish()
+        page = feed(client, since)
+        assert summary(page['results']) == [('title', title.id, 'update')], (
+            'Проверьте, что изменения долгих транзакций не теряются'
+        )
+        assert page['since'] > since
+
+    def test_unnumbered_entries_wait_for_the_next_commit(self, client, title, monkeypatch):
+        since = feed(client)['since']
+
+        def locked():
+            raise OperationalError('database is locked')
+
+        monkeypatch.setattr(changes, 'number_entries', locked)
+        title.name = 'Новое название'
+        title.save()
+        assert feed(client, since)['results'] == []
+        monkeypatch.undo()
+        changes.publish()
+        assert summary(feed(client, since)['results']) == [('title', title.id, 'update')]
+
+    def test_reset_drops_earlier_entries(self, client, title):
+        call_command('load_csv', '--clear', '--batch-size', '500', stdout=io.StringIO())
+        results = feed(client, limit=1000)['results']
+        assert summary(results[:1]) == [(None, None, 'reset')]
+        # Titles rated by rebuild_ratings end with an update, applied
+        # as an upsert too.
+        assert Title.objects.count() and all(
+            change['action'] in ('create', 'update') and 'data' in change for change in results[1:]
+        ), 'Проверьте, что загруженные данные попадают в ленту'
+        assert {change['id'] for change in results if change['type'] == 'title'} == set(
+            Title.objects.values_list('id', flat=True)
+        )
+
+    def test_snapshot_command(self, client, title):
+        ChangeLogEntry.objects.all().delete()
+        call_command('changelog_snapshot', stdout=io.StringIO())
+        assert summary(feed(client)['results']) == [(None, None, 'reset'), ('title', title.id, 'create')]
+
+    @pytest.mark.parametrize('params', [
+        {'since': 'last'}, {'since': -1}, {'limit': 0}, {'limit': 1001}, {'type': 'genre'},
+    ])
+    def test_invalid_params(self, client, params):
+        assert client.get(URL, params).status_code == 400
@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from api_v1.models import Title
+
+
+@pytest.mark.django_db
+class TestGZipMiddleware:
+
+    @pytest.fixture
+    def titles(self, category):
+        return Title.objects.bulk_create(
+            Title(name=f'Произведение номер {number}', year=2000, category=category)
+            for number in range(10)
+        )
+
+    def test_large_responses_are_compressed(self, client, titles):
+        plain = client.get('/api/v1/titles/')
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        assert len(plain.content) >= settings.GZIP_MIN_LENGTH
+        assert response['Content-Encoding'] == 'gzip', 'Проверьте, что большие ответы сжимаются'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+        assert len(response.content) < len(plain.content)
+
+    def test_small_responses_are_not(self, client, category):
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        assert len(response.content) < settings.GZIP_MIN_LENGTH
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что ответы меньше GZIP_MIN_LENGTH не сжимаются'
+        )
+
+    def test_threshold_is_a_setting(self, client, titles, settings):
+        settings.GZIP_MIN_LENGTH = 10 ** 6
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+
+
+class TestCompressedStaticFiles:
+
+    @pytest.fixture
+    def static_root(self, tmp_path, settings):
+        settings.STATIC_ROOT = str(tmp_path)
+        call_command('collectstatic', '--noinput', verbosity=0)
+        return tmp_path
+
+    def test_collectstatic_writes_gzip_variants(self, static_root):
+        manifest = json.loads((static_root / 'staticfiles.json').read_text())
+        hashed = manifest['paths']['redoc.yaml']
+        assert hashed != 'redoc.yaml', 'Проверьте, что имена статических файлов содержат хэш'
+        for name in ('redoc.yaml', hashed):
+            original = (static_root / name).read_bytes()
+            compressed = (static_root / f'{name}.gz').read_bytes()
+            assert gzip.decompress(compressed) == original
+            assert len(compressed) < len(original)
+
+    def test_small_and_binary_files_are_left_alone(self, static_root):
+        for path in static_root.rglob('*'):
+            if path.suffix in ('.gz', '.br') or path.is_dir():
+                continue
+            if path.suffix in ('.png', '.gif', '.woff', '.woff2') or path.stat().st_size < 1024:
+                assert not os.path.exists(f'{path}.gz'), path
+
+    def test_redoc_links_the_hashed_spec(self, client, static_root):
+        hashed = json.loads((static_root / 'staticfiles.json').read_text())['paths']['redoc.yaml']
+        assert f"spec-url='/static/{hashed}'" in client.get('/redoc/').content.decode()
+
+    def test_second_run_keeps_the_variants(self, static_root):
+        variant = static_root / 'redoc.yaml.gz'
+        modified = variant.stat().st_mtime_ns
+        call_command('collectstatic', '--noinput', verbosity=0)
+        assert variant.stat().st_mtime_ns == modified
+
+
+def test_redoc_before_collectstatic(client, tmp_path, settings):
+    settings.STATIC_ROOT = str(tmp_path)
+    response = client.get('/redoc/')
+    assert response.status_code == 200
+    assert "spec-url='/static/redoc.yaml'" in response.content.decode()
+
+
+def test_nginx_serves_precompressed_static_files():
+    with open(os.path.join(settings.BASE_DIR, 'nginx', 'default.conf')) as f:
+        config = f.read()
+    assert 'gzip_static on;' in config
+    assert 'immutable' in config
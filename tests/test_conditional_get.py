@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Comment, Review
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+
+
+@pytest.fixture
+def comment(review, another_user):
+    return Comment.objects.create(review=review, author=another_user, text='Комментарий')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_not_modified_without_queries(self, client, review):
+        url = self.reviews_url(review.title)
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert etag.startswith('"'), 'Проверьте, что ETag сильный'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, 'Проверьте, что для совпадающего ETag возвращается 304'
+        assert response['ETag'] == etag
+        assert not context.captured_queries, 'Проверьте, что ответ 304 не обращается к БД'
+
+        other = client.get(f'{url}?limit=1')
+        assert other['ETag'] != etag, 'Проверьте, что ETag зависит от параметров запроса'
+
+    def test_review_changes_etag(self, client, another_user_client, review):
+        url = self.reviews_url(review.title)
+        etag = client.get(url)['ETag']
+
+        another_user_client.post(url, data={'text': 'Еще отзыв', 'score': 3})
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, 'Проверьте, что новый отзыв меняет ETag'
+        assert len(response.json()['results']) == 2
+
+    def test_comments(self, client, another_user_client, comment):
+        review = comment.review
+        url = f'{self.reviews_url(review.title)}{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        assert another_user_client.delete(f'{url}{comment.id}/').status_code == 204
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что удаление комментария меняет ETag'
+        )
+
+    def test_username_change_changes_etag(self, client, review, user):
+        url = self.reviews_url(review.title)
+        etag = client.get(url)['ETag']
+        user.username = 'RenamedUser'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['results'][0]['author'] == 'RenamedUser'
+
+    def test_titles_if_modified_since(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, 'Проверьте поддержку If-Modified-Since'
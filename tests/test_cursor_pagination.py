@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api_v1.models import Comment, Review
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+
+
+@pytest.fixture
+def comments(review, user):
+    Comment.objects.bulk_create(Comment(review=review, author=user, text=f'{i}') for i in range(25))
+    # Equal dates make the id the only tie-breaker.
+    Comment.objects.filter(id__lte=Comment.objects.order_by('id')[9].id).update(
+        pub_date=timezone.now() - timezone.timedelta(days=1)
+    )
+    return list(Comment.objects.order_by('-pub_date', '-id').values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def comments_url(self, review):
+        return f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+
+    def test_walks_all_pages(self, client, review, comments):
+        url = self.comments_url(review) + '?pagination=cursor&limit=4'
+        seen = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data, 'Проверьте, что курсорная пагинация не считает общее количество'
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+            if url:
+                assert 'pagination=cursor' in url
+        assert seen == comments, 'Проверьте, что курсор обходит все комментарии без пропусков и повторов'
+
+    def test_deep_pages_with_equal_dates(self, client, review, comments):
+        # load_csv keeps the dates of data/comments.csv, which repeat.
+        Comment.objects.update(pub_date=timezone.now())
+        expected = list(Comment.objects.order_by('-id').values_list('id', flat=True))
+        url = self.comments_url(review) + '?pagination=cursor&limit=4'
+        seen, pages = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            pages.append(data)
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+            sql = [query['sql'] for query in context.captured_queries if 'api_v1_comment' in query['sql']]
+            assert not any('OFFSET' in query for query in sql), (
+                'Проверьте, что глубокие страницы не используют OFFSET: ' + sql[-1]
+            )
+        assert seen == expected, 'Проверьте, что при равных датах курсор обходит комментарии по id'
+
+        back, url = [], pages[-1]['previous']
+        while url:
+            data = client.get(url).json()
+            back = [item['id'] for item in data['results']] + back
+            url = data['previous']
+        assert back == expected[:len(back)] and len(back) == 24, (
+            'Проверьте, что ссылки previous ведут назад без пропусков'
+        )
+
+    def test_invalid_cursor(self, client, review):
+        response = client.get(self.comments_url(review) + '?pagination=cursor&cursor=broken')
+        assert response.status_code == 404
+
+    def test_limit_offset_is_default(self, client, review, comments):
+        data = client.get(self.comments_url(review)).json()
+        assert data['count'] == 25
+        assert len(data['results']) == 10
+
+    def test_reviews(self, client, review):
+        data = client.get(f'/api/v1/titles/{review.title_id}/reviews/?pagination=cursor').json()
+        assert [item['id'] for item in data['results']] == [review.id]
+        assert data['next'] is None
@@ -0,0 +1,116 @@
+import sqlite3
+import time
+
+import pytest
+from django.db import connection
+
+from api_yamdb.db import ConnectionPool, check_connections, mark_released
+
+
+@pytest.mark.django_db
+class TestHealthCheck:
+
+    def test_idle_dead_connection_is_replaced(self, settings, monkeypatch):
+        settings.DB_HEALTH_CHECK_INTERVAL = 30
+        connection.ensure_connection()
+        mark_released()
+        closed = []
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(True))
+
+        check_connections()
+        assert closed == [], 'Проверьте, что недавно использованное соединение не проверяется'
+
+        connection.released_at = time.monotonic() - 60
+        check_connections()
+        assert closed == [True]
+
+    def test_healthy_connection_is_kept(self, settings, monkeypatch):
+        settings.DB_HEALTH_CHECK_INTERVAL = 0
+        connection.ensure_connection()
+        mark_released()
+        monkeypatch.setattr(connection, 'close', lambda: pytest.fail('closed a usable connection'))
+        check_connections()
+
+
+class TestConnectionPool:
+
+    def test_reuses_idle_connections(self):
+        opened = []
+
+        def connect():
+            opened.append(sqlite3.connect(':memory:'))
+            return opened[-1]
+
+        pool = ConnectionPool(size=1)
+        first = pool.get(connect)
+        pool.put(first)
+        assert pool.get(connect) is first
+        second = pool.get(connect)
+        assert len(opened) == 2
+
+        pool.put(first)
+        pool.put(second)
+        with pytest.raises(sqlite3.ProgrammingError):
+            second.execute('SELECT 1'), 'Соединения сверх размера пула должны закрываться'
+
+    def test_killed_connection_is_replaced(self, settings):
+        settings.DB_HEALTH_CHECK_INTERVAL = 30
+        pool = ConnectionPool(size=2)
+        killed = pool.get(lambda: sqlite3.connect(':memory:'))
+        pool.put(killed)
+        # The server went away while the connection waited in the pool.
+        killed.close()
+        pool.idle.queue[-1] = (killed, time.monotonic() - 60)
+        fresh = pool.get(lambda: sqlite3.connect(':memory:'))
+        assert fresh is not killed, 'Проверьте, что долго простаивавшее соединение проверяется перед выдачей'
+        assert fresh.execute('SELECT 1').fetchone() == (1,)
+
+    def test_recently_released_connection_is_not_pinged(self, settings, monkeypatch):
+        settings.DB_HEALTH_CHECK_INTERVAL = 30
+        pool = ConnectionPool(size=1)
+        db = pool.get(lambda: sqlite3.connect(':memory:'))
+        pool.put(db)
+        monkeypatch.setattr(pool, 'ping', lambda connection: pytest.fail('pinged a fresh connection'))
+        assert pool.get(lambda: sqlite3.connect(':memory:')) is db
+
+    def test_closed_connection_is_dropped(self, settings):
+        settings.DB_HEALTH_CHECK_INTERVAL = 30
+
+        class ClosedConnection:
+            # psycopg2 sets closed once the connection is lost.
+            closed = 2
+
+            def rollback(self):
+                pass
+
+            def cursor(self):
+                pytest.fail('pinged a closed connection')
+
+        pool = ConnectionPool(size=2)
+        pool.put(ClosedConnection())
+        assert isinstance(pool.get(lambda: sqlite3.connect(':memory:')), sqlite3.Connection)
+
+    def test_open_transaction_is_rolled_back(self):
+        pool = ConnectionPool(size=1)
+        db = pool.get(lambda: sqlite3.connect(':memory:'))
+        db.execute('CREATE TABLE t (x INTEGER)')
+        db.commit()
+        db.execute('INSERT INTO t VALUES (1)')
+        pool.put(db)
+        assert db.execute('SELECT COUNT(*) FROM t').fetchone() == (0,)
+
+
+class TestGunicornConf:
+
+    def test_several_workers_need_a_shared_cache(self, settings):
+        from api_yamdb import gunicorn_conf
+
+        gunicorn_conf.check_shared_cache(1)
+        with pytest.raises(RuntimeError):
+            gunicorn_conf.check_shared_cache(3)
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': 'memcached:11211',
+        }}
+        gunicorn_conf.check_shared_cache(3)
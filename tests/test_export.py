@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+from django.conf import settings
+
+from api_v1.models import Comment, Review, Title
+
+
+def content(response):
+    assert response.status_code == 200, response.content
+    assert response.streaming, 'Проверьте, что выгрузка отдаётся через StreamingHttpResponse'
+    return b''.join(response.streaming_content).decode()
+
+
+def data_header(name):
+    with open(os.path.join(settings.BASE_DIR, 'data', name), encoding='utf-8') as f:
+        return next(csv.reader(f))
+
+
+@pytest.fixture
+def reviewed_title(title, user, another_user):
+    other = Title.objects.create(name='Без жанров', year=2000)
+    review = Review.objects.create(title=title, author=user, text='Текст, с запятой\nи строкой', score=9)
+    Review.objects.create(title=title, author=another_user, text='Ещё', score=6)
+    Comment.objects.create(review=review, author=another_user, text='Согласен')
+    return title, other
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    @pytest.mark.parametrize('dataset, data_file', [
+        ('reviews', 'review.csv'), ('comments', 'comments.csv'),
+    ])
+    def test_csv_columns_follow_data_files(self, admin_client, reviewed_title, dataset, data_file):
+        rows = list(csv.reader(io.StringIO(content(admin_client.get(f'/api/v1/export/{dataset}.csv')))))
+        assert rows[0] == data_header(data_file)
+        assert len(rows) > 1
+
+    def test_titles_csv(self, admin_client, reviewed_title, genres, category):
+        title, other = reviewed_title
+        response = admin_client.get('/api/v1/export/titles.csv')
+        assert response['Content-Disposition'] == 'attachment; filename="titles.csv"'
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        assert list(rows[0])[:4] == data_header('titles.csv')
+        assert rows[0] == {
+            'id': str(title.id), 'name': title.name, 'year': str(title.year), 'category': str(category.id),
+            'description': title.description, 'genre': f'{genres[0].id} {genres[1].id}', 'rating': '7',
+        }
+        assert (rows[1]['genre'], rows[1]['rating'], rows[1]['category']) == ('', '', '')
+
+    def test_ndjson(self, admin_client, reviewed_title):
+        response = admin_client.get('/api/v1/export/reviews.ndjson', HTTP_ACCEPT='application/x-ndjson')
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        assert [row['score'] for row in rows] == [9, 6]
+        assert rows[0]['text'] == 'Текст, с запятой\nи строкой'
+        assert rows[0]['pub_date'].endswith('Z')
+
+    def test_admin_only(self, client, user_client):
+        assert client.get('/api/v1/export/titles.csv').status_code == 401
+        assert user_client.get('/api/v1/export/titles.csv').status_code == 403
+
+    def test_unknown_dataset_or_format(self, admin_client):
+        assert admin_client.get('/api/v1/export/users.csv').status_code == 404
+        assert admin_client.get('/api/v1/export/titles.xml').status_code == 404
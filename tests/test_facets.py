@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Category, Title, Title2Genre
+
+
+@pytest.fixture
+def catalogue(title, category, genres):
+    drama, comedy = genres
+    book = Category.objects.create(name='Книга', slug='book')
+    for name, year, genre, cat in (
+        ('Комедия 1', 1999, comedy, category),
+        ('Комедия 2', 2005, comedy, book),
+        ('Драма', 2001, drama, book),
+    ):
+        Title2Genre.objects.create(title=Title.objects.create(name=name, year=year, category=cat), genre=genre)
+
+
+@pytest.mark.django_db
+class TestTitleFacets:
+
+    def test_facets_of_filtered_list(self, client, catalogue):
+        data = client.get('/api/v1/titles/?facets=true&genre=comedy&limit=1').json()
+        assert len(data['results']) == 1
+        facets = data['facets']
+        assert facets['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 3},
+            {'slug': 'drama', 'name': 'Драма', 'count': 1},
+        ], 'Проверьте, что фасеты считаются по всему отфильтрованному списку'
+        assert {(f['slug'], f['count']) for f in facets['category']} == {('movie', 2), ('book', 1)}
+        assert facets['year'] == [
+            {'from': 1990, 'to': 1999, 'count': 2},
+            {'from': 2000, 'to': 2009, 'count': 1},
+        ]
+
+    def test_facets_are_optional(self, client, catalogue):
+        assert 'facets' not in client.get('/api/v1/titles/').json()
+
+    def test_facets_cached_per_filter(self, client, catalogue):
+        client.get('/api/v1/titles/?facets=true&category=book&limit=1')
+        with CaptureQueriesContext(connection) as context:
+            data = client.get('/api/v1/titles/?facets=true&category=book&limit=1&offset=1').json()
+        assert data['facets']['category'] == [{'slug': 'book', 'name': 'Книга', 'count': 2}]
+        assert len(context.captured_queries) == 3, (
+            'Проверьте, что фасеты не пересчитываются для другой страницы того же фильтра'
+        )
@@ -0,0 +1,82 @@
+import pytest
+from django.db import IntegrityError, connection
+
+from api_v1.filters import TitleFilter
+from api_v1.models import Comment, Review, Title
+from api_v1.rankings import ORDERINGS
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite', reason='plans are checked on SQLite')
+
+
+def plan(queryset):
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+class TestIndexes:
+
+    def test_reviews_of_title(self, title):
+        query_plan = plan(Review.objects.filter(title_id=title.id).order_by('-pub_date', '-id'))
+        assert 'review_title_pub_date_idx' in query_plan, query_plan
+        assert 'TEMP B-TREE' not in query_plan, 'Проверьте, что отзывы сортируются по индексу'
+
+    def test_comments_of_review(self):
+        query_plan = plan(Comment.objects.filter(review_id=1).order_by('-pub_date', '-id'))
+        assert 'comment_review_pub_date_idx' in query_plan, query_plan
+        assert 'TEMP B-TREE' not in query_plan
+
+    def test_titles_of_category(self, category):
+        query_plan = plan(Title.objects.filter(category_id=category.id).order_by('name'))
+        assert 'title_category_name_idx' in query_plan, query_plan
+        assert 'TEMP B-TREE' not in query_plan
+
+    def test_titles_by_rating(self, category):
+        for ordering in ({'ordering': '-rating'}, {'ordering': '-rating', 'category': category.slug}):
+            query_plan = plan(TitleFilter(ordering, queryset=Title.objects.all()).qs[:10])
+            assert 'title_rating_idx' in query_plan, query_plan
+            assert 'TEMP B-TREE' not in query_plan, 'Проверьте, что список по рейтингу читается по индексу'
+        query_plan = plan(Title.objects.filter(rating__isnull=False).order_by(*ORDERINGS['rating'])[:10])
+        assert 'title_rating_idx' in query_plan and 'TEMP B-TREE' not in query_plan, query_plan
+
+    def test_rating_index_keeps_nulls_last_on_postgres(self, monkeypatch):
+        index = next(index for index in Title._meta.indexes if index.name == 'title_rating_idx')
+        editor = connection.schema_editor(collect_sql=True)
+        assert 'NULLS' not in str(index.create_sql(Title, editor)), 'SQLite отвергает NULLS LAST в CREATE INDEX'
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        sql = str(index.create_sql(Title, editor))
+        assert '"rating" DESC NULLS LAST, "rating_count" DESC NULLS LAST, "id"' in sql, sql
+
+    def test_review_of_author_is_a_unique_lookup(self, title, user):
+        query_plan = plan(Review.objects.filter(title_id=title.id, author_id=user.id))
+        assert 'USING' in query_plan and 'INDEX' in query_plan, query_plan
+        assert '(title_id=? AND author_id=?)' in query_plan, query_plan
+
+
+@pytest.mark.django_db
+class TestUniqueReview:
+
+    def test_second_review_is_rejected_by_the_database(self, title, user):
+        Review.objects.create(title=title, author=user, text='Первый', score=5)
+        with pytest.raises(IntegrityError):
+            Review.objects.create(title=title, author=user, text='Второй', score=6)
+
+    def test_api_answers_400_and_keeps_rating(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert user_client.post(url, data={'text': 'Первый', 'score': 5}).status_code == 201
+        response = user_client.post(url, data={'text': 'Второй', 'score': 9})
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': ['Review already exist']}, (
+            'Проверьте, что ошибка повторного отзыва отдаётся в прежнем формате'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    def test_other_integrity_errors_are_not_hidden(self, user_client, title, monkeypatch):
+        def broken_save(*args, **kwargs):
+            raise IntegrityError('NOT NULL constraint failed: api_v1_review.text')
+
+        monkeypatch.setattr(Review, 'save', broken_save)
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{title.id}/reviews/', data={'text': 'Отзыв', 'score': 5})
@@ -0,0 +1,91 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Category, Comment, Genre, Review, Title, Title2Genre
+
+
+@pytest.fixture
+def catalogue(user, another_user, admin):
+    genres = [
+        Genre.objects.create(name='Ужасы', slug='horror'),
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Аниме', slug='anime'),
+    ]
+    category = Category.objects.create(name='Фильм', slug='movie')
+    titles = [
+        Title.objects.create(name='Без всего', description=''),
+        Title.objects.create(name='Только жанры', year=1999),
+        Title.objects.create(
+            name='Кавычки "и" \\ слэши', year=2020, category=category,
+            description='Перевод строки и эмодзи 🎬',
+        ),
+    ]
+    for genre in genres:
+        Title2Genre.objects.create(title=titles[1], genre=genre)
+    Title2Genre.objects.create(title=titles[2], genre=genres[1])
+    for score, author in zip((10, 3, 7), (user, another_user, admin)):
+        review = Review.objects.create(
+            title=titles[2], author=author, text=f'Отзыв <{score}>\n', score=score
+        )
+        for text in ('Согласен', 'Нет'):
+            Comment.objects.create(review=review, author=user, text=text)
+    return titles
+
+
+def fetch(client, settings, url, fast):
+    settings.FAST_LISTS = fast
+    cache.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response.content
+
+
+@pytest.mark.django_db
+class TestFastLists:
+
+    def urls(self, titles):
+        title = titles[2]
+        review = Review.objects.filter(title=title).first()
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        return [
+            '/api/v1/titles/',
+            '/api/v1/titles/?limit=2&offset=1',
+            '/api/v1/titles/?genre=drama&facets=true',
+            '/api/v1/titles/?category=movie',
+            '/api/v1/titles/?ordering=-rating',
+            '/api/v1/titles/?ordering=-year',
+            reviews,
+            f'{reviews}?limit=1&offset=1',
+            f'{reviews}?pagination=cursor&limit=2',
+            comments,
+            f'{comments}?pagination=cursor&limit=1',
+        ]
+
+    def test_same_json_as_the_serializers(self, client, settings, catalogue):
+        for url in self.urls(catalogue):
+            slow = fetch(client, settings, url, fast=False)
+            assert fetch(client, settings, url, fast=True) == slow, (
+                f'Проверьте, что быстрый список {url} совпадает с сериализатором'
+            )
+
+    def test_next_cursor_page(self, client, settings, catalogue):
+        url = f'/api/v1/titles/{catalogue[2].id}/reviews/?pagination=cursor&limit=2'
+        next_url = client.get(url).json()['next']
+        assert next_url
+        assert fetch(client, settings, next_url, fast=True) == fetch(
+            client, settings, next_url, fast=False
+        )
+
+    def test_queries_do_not_grow_with_the_page(self, client, settings, catalogue):
+        settings.FAST_LISTS = True
+        url = f'/api/v1/titles/{catalogue[2].id}/reviews/'
+        with CaptureQueriesContext(connection) as one_author:
+            client.get(f'{url}?limit=1')
+        with CaptureQueriesContext(connection) as three_authors:
+            client.get(f'{url}?limit=3')
+        assert len(three_authors) == len(one_author), (
+            'Проверьте, что авторы отзывов загружаются в том же запросе'
+        )
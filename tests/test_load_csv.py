@@ -0,0 +1,66 @@
+import csv
+import io
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from api_v1.management.commands.load_csv import Command
+from api_v1.models import (Comment, CustomUser, Genre, Review, Title,
+                           Title2Genre, TitleRanking)
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'data')
+
+
+def csv_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.django_db
+class TestLoadCsv:
+
+    def test_load_data_directory(self):
+        call_command('load_csv', '--batch-size', '7', stdout=io.StringIO())
+
+        assert Title.objects.count() == len(csv_rows('titles.csv'))
+        assert Genre.objects.count() == len(csv_rows('genre.csv'))
+        assert Title2Genre.objects.count() == len(csv_rows('genre_title.csv'))
+        reviews = csv_rows('review.csv')
+        assert Review.objects.count() == len({(row['title_id'], row['author']) for row in reviews}), (
+            'Проверьте, что повторные отзывы пользователя на произведение пропускаются'
+        )
+        assert Comment.objects.count() == len(csv_rows('comments.csv'))
+
+        first_review = csv_rows('review.csv')[0]
+        review = Review.objects.get(pk=first_review['id'])
+        assert review.pub_date.isoformat().startswith(first_review['pub_date'][:19]), (
+            'Проверьте, что дата публикации берется из файла'
+        )
+        assert review.author.username == 'bingobongo'
+        title = Title.objects.get(pk=first_review['title_id'])
+        assert title.rating_count == Review.objects.filter(title=title).count(), (
+            'Проверьте, что после загрузки рейтинги пересчитаны'
+        )
+
+    def test_reload(self, user):
+        out = io.StringIO()
+        call_command('load_csv', stdout=out)
+        with pytest.raises(CommandError):
+            call_command('load_csv', stdout=out)
+
+        call_command('load_csv', '--clear', stdout=out)
+        assert Title.objects.count() == len(csv_rows('titles.csv'))
+        assert CustomUser.objects.filter(pk=user.pk).exists(), 'Проверьте, что --clear не удаляет пользователей'
+
+    def test_clear_leaves_no_dangling_rows(self):
+        call_command('load_csv', stdout=io.StringIO())
+        assert TitleRanking.objects.exists()
+
+        Command().clear()
+        assert not TitleRanking.objects.exists(), 'Проверьте, что --clear удаляет рейтинги произведений'
+        # Foreign keys are checked at commit, the test never commits.
+        connection.check_constraints()
@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+from api_v1.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_server_timing_header(self, client, title):
+        response = client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert timing.startswith('app;dur=')
+        assert 'db;dur=' in timing and 'queries' in timing
+
+    def test_route_histogram(self, client, admin_client, title):
+        for _ in range(3):
+            client.get(f'/api/v1/titles/{title.id}/reviews/')
+
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        labels = 'method="GET",view="Review-list"'
+        assert f'yamdb_request_duration_seconds_count{{{labels}}} 3' in text
+        assert f'yamdb_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+        assert 'yamdb_request_queries_total{' + labels in text
+        assert 'yamdb_cache_requests_total{namespace="titles",outcome="misses"}' in text
+
+    def test_metrics_are_admin_only(self, client, user_client):
+        assert client.get('/api/v1/metrics/').status_code == 401
+        assert user_client.get('/api/v1/metrics/').status_code == 403
+
+    def test_slow_request_is_logged_with_duplicates(self, client, title, settings, caplog):
+        settings.SLOW_REQUEST_DUPLICATES = 1
+        with caplog.at_level(logging.WARNING, logger='api_v1.metrics'):
+            client.get(f'/api/v1/titles/{title.id}/reviews/')
+            client.get('/api/v1/genres/')
+        assert not caplog.records
+
+        settings.SLOW_REQUEST_QUERIES = 1
+        with caplog.at_level(logging.WARNING, logger='api_v1.metrics'):
+            client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert 'Slow request GET' in caplog.text
+        assert 'SELECT' in caplog.text
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from api_v1.models import OutboxEmail
+from api_v1.outbox import backoff, queue_email, send_batch
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_auth_email_only_queues(self, client, user):
+        response = client.post('/api/v1/auth/email', data={'email': user.email})
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, 'Проверьте, что письмо не отправляется во время запроса'
+
+        email = OutboxEmail.objects.get()
+        user.refresh_from_db()
+        assert email.to == user.email
+        assert user.confirmation_code in email.body
+
+    def test_batch_uses_one_connection(self):
+        for i in range(5):
+            queue_email('subject', f'body {i}', 'from@yamdb.fake', f'to{i}@yamdb.fake')
+
+        with mock.patch('api_v1.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            assert send_batch(batch_size=10) == (5, 0)
+        assert get_connection.call_count == 1
+        assert len(mail.outbox) == 5
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+        assert send_batch() == (0, 0), 'Проверьте, что отправленные письма не отправляются повторно'
+
+    def test_failed_email_is_retried_with_backoff(self):
+        email = queue_email('subject', 'body', 'from@yamdb.fake', 'to@yamdb.fake')
+        with mock.patch('api_v1.outbox.EmailMessage.send', side_effect=OSError('timeout')):
+            assert send_batch() == (0, 1)
+
+        email.refresh_from_db()
+        assert email.attempts == 1
+        assert email.last_error == 'timeout'
+        assert email.next_attempt_at > timezone.now()
+        assert send_batch() == (0, 0), 'Проверьте, что письмо не отправляется до истечения паузы'
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        assert send_batch() == (1, 0)
+        assert backoff(1) < backoff(2) < backoff(3)
+
+    def test_gives_up_after_max_attempts(self):
+        queue_email('subject', 'body', 'from@yamdb.fake', 'to@yamdb.fake')
+        OutboxEmail.objects.update(attempts=3)
+        assert send_batch(max_attempts=3) == (0, 0)
+
+    def test_command(self):
+        for i in range(3):
+            queue_email('subject', 'body', 'from@yamdb.fake', f'to{i}@yamdb.fake')
+        out = StringIO()
+        call_command('send_outbox', '--batch-size', '2', stdout=out)
+        assert 'Sent 3 emails' in out.getvalue()
+        assert len(mail.outbox) == 3
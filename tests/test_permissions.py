@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api_v1.models import Review
+from api_v1.permissions import IsOwner
+
+
+@pytest.mark.django_db
+class TestRoles:
+
+    @pytest.mark.parametrize('role, is_admin, is_moderator', [
+        ('admin', True, False), ('A', True, False),
+        ('moderator', False, True), ('M', False, True),
+        ('user', False, False), ('U', False, False),
+    ])
+    def test_role_codes_and_names(self, user, role, is_admin, is_moderator):
+        user.role = role
+        assert (user.is_admin(), user.is_moderator()) == (is_admin, is_moderator)
+
+    def test_role_change_is_noticed(self, user):
+        assert not user.is_admin()
+        user.role = 'A'
+        assert user.is_admin()
+
+    def test_admin_code_can_manage_titles(self, user, user_client, category):
+        user.role = 'A'
+        user.save()
+        response = user_client.post('/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+        assert response.status_code == 201, 'Проверьте, что роль "A" из ROLE_CHOICES считается администратором'
+
+    def test_owner_check_does_not_load_author(self, user, another_user, title):
+        Review.objects.create(title=title, author=user, text='Текст', score=5)
+        review = Review.objects.get()
+        request = APIRequestFactory().patch('/')
+        permission = IsOwner()
+
+        with CaptureQueriesContext(connection) as context:
+            request.user = user
+            assert permission.has_object_permission(request, None, review)
+            request.user = another_user
+            assert not permission.has_object_permission(request, None, review)
+        assert len(context.captured_queries) == 0
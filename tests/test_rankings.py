@@ -0,0 +1,191 @@
+import io
+import math
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api_v1 import rankings
+from api_v1.models import (Category, Genre, Review, Title, Title2Genre,
+                           TitleRanking)
+from api_v1.rankings import refresh_rankings, trending
+
+
+def make_title(name, category=None, genres=()):
+    title = Title.objects.create(name=name, year=2000, category=category)
+    for genre in genres:
+        Title2Genre.objects.create(title=title, genre=genre)
+    return title
+
+
+def review(title, author, score, days_ago=0):
+    created = Review.objects.create(title=title, author=author, text='-', score=score)
+    if days_ago:
+        Review.objects.filter(pk=created.pk).update(
+            pub_date=timezone.now() - timedelta(days=days_ago)
+        )
+    return created
+
+
+class TestTrending:
+
+    def test_score_halves_every_half_life(self, settings):
+        settings.TRENDING_HALF_LIFE_DAYS = 7
+        now = timezone.now()
+        fresh = trending([(8, now)])
+        week_old = trending([(8, now - timedelta(days=7))])
+        assert math.isclose(fresh - week_old, math.log(2))
+        assert math.isclose(trending([(8, now), (8, now)]), fresh + math.log(2))
+
+    def test_recent_reviews_do_not_overflow(self, settings):
+        settings.TRENDING_HALF_LIFE_DAYS = 0.1
+        assert math.isfinite(trending([(10, timezone.now())] * 3))
+
+
+def expected_trending(title):
+    return trending(Review.objects.filter(title=title).values_list('score', 'pub_date'))
+
+
+@pytest.mark.django_db
+class TestRefresh:
+
+    def test_rankings_follow_the_reviews(self, title, user, another_user):
+        make_title('Без отзывов')
+        review(title, user, 9)
+        review(title, another_user, 4)
+        TitleRanking.objects.all().delete()
+
+        assert refresh_rankings() == 1
+        ranking = TitleRanking.objects.get()
+        assert ranking.title_id == title.id
+        assert math.isclose(ranking.trending, expected_trending(title))
+
+        Review.objects.all().delete()
+        refresh_rankings([title.id])
+        assert not TitleRanking.objects.exists()
+
+    def test_rebuild_rankings_command(self, title, user):
+        review(title, user, 7)
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_rankings', stdout=io.StringIO())
+        assert math.isclose(TitleRanking.objects.get().trending, expected_trending(title))
+
+
+@pytest.mark.django_db
+class TestIncrementalTrending:
+
+    def test_writes_move_one_share(self, title, category, user, another_user, monkeypatch):
+        other = make_title('Другое', category=category)
+        first = review(title, user, 9)
+        review(title, another_user, 4)
+        monkeypatch.setattr(rankings, 'refresh_rankings', None)
+
+        first.score = 2
+        first.save()
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title))
+        first.title = other
+        first.save()
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title)), (
+            'Проверьте, что оценка в тренде сдвигается на долю отзыва, а не пересчитывается'
+        )
+        assert math.isclose(TitleRanking.objects.get(title=other).trending, expected_trending(other))
+
+    def test_last_review_takes_the_ranking_off(self, title, user):
+        created = review(title, user, 9)
+        assert TitleRanking.objects.filter(title=title).exists()
+        created.score = 3
+        created.save()
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title))
+        created.delete()
+        assert not TitleRanking.objects.filter(title=title).exists()
+
+    def test_deleted_author(self, title, user, another_user):
+        review(title, user, 9)
+        review(title, another_user, 4)
+        user.delete()
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReviewWrites:
+
+    def test_review_writes_move_the_ranking(self, title, user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'Шедевр', 'score': 10})
+        assert response.status_code == 201
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title)), (
+            'Проверьте, что оценка в тренде обновляется после создания отзыва'
+        )
+        user_client.patch(f'{url}{response.json()["id"]}/', data={'score': 3})
+        assert math.isclose(TitleRanking.objects.get(title=title).trending, expected_trending(title))
+        user_client.delete(f'{url}{response.json()["id"]}/')
+        assert not TitleRanking.objects.filter(title=title).exists()
+
+
+@pytest.mark.django_db
+class TestTopTitles:
+
+    @pytest.fixture
+    def catalogue(self, user, another_user):
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        book = Category.objects.create(name='Книга', slug='book')
+        old_hit = make_title('Старый хит', genres=[drama])
+        new_hit = make_title('Новинка', category=book)
+        average = make_title('Середнячок', category=book, genres=[drama])
+        make_title('Без отзывов')
+        review(old_hit, user, 10, days_ago=60)
+        review(old_hit, another_user, 10, days_ago=60)
+        review(new_hit, user, 8)
+        review(average, user, 5, days_ago=1)
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        refresh_rankings()
+        return old_hit, new_hit, average
+
+    def names(self, response):
+        assert response.status_code == 200, response.content
+        return [title['name'] for title in response.json()]
+
+    def test_top_rated(self, client, catalogue):
+        response = client.get('/api/v1/titles/top')
+        assert self.names(response) == ['Старый хит', 'Новинка', 'Середнячок']
+        assert response.json()[0]['rating'] == 10
+        assert response.json()[0]['genre'] == [{'name': 'Драма', 'slug': 'drama'}]
+
+    def test_trending(self, client, catalogue):
+        response = client.get('/api/v1/titles/top', {'by': 'trending'})
+        assert self.names(response) == ['Новинка', 'Середнячок', 'Старый хит']
+
+    def test_by_genre_and_category(self, client, catalogue):
+        assert self.names(client.get('/api/v1/titles/top', {'genre': 'drama'})) == [
+            'Старый хит', 'Середнячок'
+        ]
+        assert self.names(client.get(
+            '/api/v1/titles/top', {'category': 'book', 'limit': 1}
+        )) == ['Новинка']
+
+    def test_invalid_params(self, client, catalogue):
+        assert client.get('/api/v1/titles/top', {'by': 'views'}).status_code == 400
+        assert client.get('/api/v1/titles/top', {'limit': 0}).status_code == 400
+        assert client.get('/api/v1/titles/top', {'limit': 101}).status_code == 400
+
+    def test_titles_ordered_by_rating(self, client, catalogue):
+        response = client.get('/api/v1/titles/', {'ordering': '-rating'})
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Старый хит', 'Новинка', 'Середнячок', 'Без отзывов'], (
+            'Проверьте, что произведения без отзывов идут последними'
+        )
+        response = client.get('/api/v1/titles/', {'ordering': 'rating'})
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Середнячок', 'Новинка', 'Старый хит', 'Без отзывов']
+
+    def test_sorted_by_the_rating_shown(self, client, catalogue, user):
+        old_hit, new_hit, average = catalogue
+        Review.objects.filter(title=old_hit).delete()
+        response = client.get('/api/v1/titles/', {'ordering': '-rating'})
+        ratings = [title['rating'] for title in response.json()['results']]
+        assert ratings == [8, 5, None, None], (
+            'Проверьте, что произведения сортируются по тому рейтингу, который отдаёт API'
+        )
+        top = client.get('/api/v1/titles/top').json()
+        assert [title['rating'] for title in top] == [8, 5]
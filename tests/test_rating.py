@@ -0,0 +1,99 @@
+import pytest
+from django.core.management import call_command
+
+from api_v1.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_rating_follows_review_writes(self, title, user_client, another_user_client):
+        response = user_client.post(self.reviews_url(title), data={'text': 'Шедевр', 'score': 10})
+        assert response.status_code == 201, 'Проверьте, что отзыв создается'
+        another_user_client.post(self.reviews_url(title), data={'text': 'Неплохо', 'score': 5})
+
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (15, 2), (
+            'Проверьте, что сумма и количество оценок обновляются при создании отзыва'
+        )
+        response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == 7, 'Проверьте, что рейтинг округляется вниз'
+
+        review_id = Review.objects.get(text='Шедевр').id
+        user_client.patch(f'{self.reviews_url(title)}{review_id}/', data={'score': 1})
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (6, 2), (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки'
+        )
+
+        user_client.delete(f'{self.reviews_url(title)}{review_id}/')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+
+    def test_title_without_reviews(self, title, user_client):
+        response = user_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен None'
+        )
+
+    def test_rebuild_ratings_command(self, title, user, another_user):
+        Review.objects.create(title=title, author=user, text='a', score=9)
+        Review.objects.create(title=title, author=another_user, text='b', score=4)
+        Title.objects.filter(pk=title.pk).update(rating_sum=100, rating_count=1)
+
+        call_command('rebuild_ratings')
+
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что команда rebuild_ratings пересчитывает рейтинг'
+        )
+        assert title.rating == 6
+
+    def test_deleting_the_author_takes_the_reviews_off(self, title, user, another_user, admin_client):
+        Review.objects.create(title=title, author=user, text='a', score=10)
+        Review.objects.create(title=title, author=another_user, text='b', score=4)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204, response.content
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (4, 1), (
+            'Проверьте, что рейтинг пересчитывается при каскадном удалении отзывов'
+        )
+
+    def test_orm_writes_keep_the_rating(self, title, category, user):
+        other = Title.objects.create(name='Другое', year=2000, category=category)
+        review = Review.objects.create(title=title, author=user, text='a', score=8)
+        review.score = 3
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (3, 1)
+
+        review.title = other
+        review.save()
+        title.refresh_from_db()
+        other.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (0, 0)
+        assert (other.rating_sum, other.rating_count) == (3, 1)
+
+        Review.objects.all().delete()
+        other.refresh_from_db()
+        assert (other.rating_sum, other.rating_count) == (0, 0)
+
+    def test_saving_a_stale_title_keeps_the_rating(self, title, user, admin_client):
+        stale = Title.objects.get(pk=title.pk)
+        Review.objects.create(title=title, author=user, text='a', score=8)
+        stale.name = 'Новое название'
+        stale.save()
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/', data={'name': 'Новое название', 'year': 1995}
+        )
+        assert response.status_code == 200, response.content
+        title.refresh_from_db()
+        assert (title.name, title.year) == ('Новое название', 1995)
+        assert (title.rating_sum, title.rating_count) == (8, 1), (
+            'Проверьте, что сохранение произведения не перезаписывает рейтинг'
+        )
@@ -0,0 +1,76 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+import pytz
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from api_v1.renderers import FastJSONRenderer
+
+UTC = datetime.timezone.utc
+
+DATA = {
+    'utc datetime': datetime.datetime(2020, 1, 13, 23, 20, 2, 422000, tzinfo=UTC),
+    'whole second': datetime.datetime(2020, 1, 13, 23, 20, 2, tzinfo=UTC),
+    'naive datetime': datetime.datetime(2020, 1, 13, 23, 20, 2),
+    'moscow datetime': pytz.timezone('Europe/Moscow').localize(datetime.datetime(2021, 6, 1, 12)),
+    'date': datetime.date(2021, 6, 1),
+    'time': datetime.time(12, 30, 15, 500),
+    'decimal rating': Decimal('7.50'),
+    'no rating': None,
+    'text': 'Побег из Шоушенка — «шедевр» 🎬 "кавычки" \\ \t\n',
+    'line separators': 'a b c',
+    'error': ErrorDetail('Обязательное поле.', code='required'),
+    'lazy': gettext_lazy('This field is required.'),
+    'numbers': [0, -1, 2 ** 63 - 1, 0.1, 7.25, True, False],
+    'int keys': {1: 'a', 2: 'b'},
+    'page': ReturnList([ReturnDict({'id': 1, 'genre': []}, serializer=None)], serializer=None),
+    'empty': {'list': [], 'dict': {}, 'string': ''},
+}
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('key', DATA)
+    def test_same_bytes_as_drf(self, key):
+        data = {key: DATA[key]}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_russian_text_is_not_escaped(self):
+        content = FastJSONRenderer().render({'name': 'Драма'})
+        assert content == '{"name":"Драма"}'.encode()
+
+    def test_exponents_are_written_differently(self):
+        data = {'floats': [1e16, 1.5e-7]}
+        assert FastJSONRenderer().render(data) == b'{"floats":[1e16,1.5e-7]}'
+        assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+    def test_falls_back_for_big_integers(self):
+        data = {'big': 2 ** 70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_unknown_types_raise_like_drf(self):
+        with pytest.raises(TypeError):
+            FastJSONRenderer().render({'object': object()})
+
+    def test_indent_falls_back(self):
+        data = {'a': [1, 2]}
+        assert FastJSONRenderer().render(
+            data, 'application/json; indent=4'
+        ) == JSONRenderer().render(data, 'application/json; indent=4')
+
+    def test_no_content(self):
+        assert FastJSONRenderer().render(None) == b''
+
+
+@pytest.mark.django_db
+def test_api_renders_with_fast_renderer(client, title):
+    response = client.get('/api/v1/titles/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/json'
+    assert 'Побег из Шоушенка'.encode() in response.content
+    assert response.renderer_context['view'].request.accepted_renderer.__class__ is FastJSONRenderer
@@ -0,0 +1,98 @@
+import pytest
+from django.core.cache import cache
+from django.db import OperationalError, connections
+
+from api_v1.models import Category, Review
+from api_yamdb.db import router
+
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    router.replica_sets.clear()
+    yield
+    router.replica_sets.clear()
+
+
+def slugs(response):
+    assert response.status_code == 200, response.content
+    return [category['slug'] for category in response.json()['results']]
+
+
+class TestReplicaRouting:
+
+    def test_reads_go_to_the_replica(self, client, title, user):
+        Review.objects.create(title=title, author=user, text='На основной', score=5)
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['count'] == 0, 'Проверьте, что GET-запросы читают данные с реплики'
+        assert router.read_alias.get() is None, 'Проверьте, что реплика выбирается только на время запроса'
+
+    def test_writes_go_to_the_primary(self, admin_client):
+        response = admin_client.post('/api/v1/categories/', data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 201, response.content
+        assert Category.objects.filter(slug='book').exists()
+        assert not Category.objects.using('replica').filter(slug='book').exists()
+
+    def test_reads_after_a_write_stay_on_the_primary(self, client, user_client, user, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert review.status_code == 201, review.content
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что после записи пользователь читает с основной базы'
+        )
+        assert client.get(url).json()['count'] == 0, 'Проверьте, что остальные читают с реплики'
+
+        cache.delete(router.pinned_key(user.pk))
+        assert user_client.get(url).json()['count'] == 0, (
+            'Проверьте, что закрепление за основной базой ограничено по времени'
+        )
+
+    def test_unhealthy_replica_is_skipped(self, client, title, user, monkeypatch):
+        Review.objects.create(title=title, author=user, text='На основной', score=5)
+
+        def broken_cursor():
+            raise OperationalError('replica is down')
+
+        monkeypatch.setattr(connections['replica'], 'cursor', broken_cursor)
+        assert client.get(f'/api/v1/titles/{title.id}/reviews/').json()['count'] == 1, (
+            'Проверьте, что без исправных реплик данные читаются с основной базы'
+        )
+
+    def test_round_robin(self):
+        replicas = router.ReplicaSet(['replica', 'default'])
+        assert [replicas.choose() for _ in range(4)] == ['replica', 'default', 'replica', 'default']
+
+    def test_health_is_checked_once_per_interval(self, settings, monkeypatch):
+        settings.REPLICA_HEALTH_CHECK_INTERVAL = 60
+        replicas = router.ReplicaSet(['replica'])
+        pings = []
+        monkeypatch.setattr(replicas, 'ping', lambda alias: pings.append(alias) or False)
+        assert [replicas.choose() for _ in range(3)] == ['default'] * 3
+        assert pings == ['replica']
+
+
+class TestReplicasAndResponseCache:
+
+    def test_cached_lists_read_the_primary(self, client, admin_client, settings):
+        settings.API_CACHE_TIMEOUT = 300
+        Category.objects.using('replica').create(name='Только на реплике', slug='stale')
+        response = admin_client.post('/api/v1/categories/', data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 201, response.content
+        assert slugs(client.get('/api/v1/categories/')) == ['book']
+        assert slugs(admin_client.get('/api/v1/categories/')) == ['book'], (
+            'Проверьте, что страница отстающей реплики не попадает в кэш ответов'
+        )
+
+    def test_replica_pages_get_no_validators(self, client, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'ETag' not in response and 'Last-Modified' not in response, (
+            'Проверьте, что ответ с реплики не получает ETag версий основной базы'
+        )
+        assert user_client.post(url, data={'text': 'Отзыв', 'score': 7}).status_code == 201
+        response = user_client.get(url)
+        assert response.json()['count'] == 1 and 'ETag' in response
+        assert user_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Genre
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    @pytest.mark.parametrize('url', ['/api/v1/titles/', '/api/v1/categories/', '/api/v1/genres/'])
+    def test_second_request_served_from_cache(self, client, title, url):
+        first, _ = get(client, url)
+        second, queries = get(client, url)
+        assert second == first
+        assert queries == 0, f'Проверьте, что повторный запрос к {url} не обращается к БД'
+
+    def test_detail_is_cached(self, client, title):
+        get(client, f'/api/v1/titles/{title.id}/')
+        _, queries = get(client, f'/api/v1/titles/{title.id}/')
+        assert queries == 0
+
+    def test_query_params_are_normalized(self, client, title):
+        get(client, '/api/v1/titles/?year=1994&genre=drama')
+        _, queries = get(client, '/api/v1/titles/?genre=drama&year=1994')
+        assert queries == 0, 'Проверьте, что порядок параметров запроса не влияет на ключ кэша'
+        _, queries = get(client, '/api/v1/titles/?genre=comedy&year=1994')
+        assert queries > 0
+
+    def test_review_invalidates_titles(self, client, user_client, title):
+        data, _ = get(client, '/api/v1/titles/')
+        assert data['results'][0]['rating'] is None
+
+        user_client.post(f'/api/v1/titles/{title.id}/reviews/', data={'text': 'Отлично', 'score': 9})
+
+        data, _ = get(client, '/api/v1/titles/')
+        assert data['results'][0]['rating'] == 9, 'Проверьте, что новый отзыв сбрасывает кэш произведений'
+
+    def test_category_and_genre_changes_invalidate(self, client, title, category):
+        get(client, '/api/v1/titles/')
+        get(client, '/api/v1/genres/')
+
+        category.delete()
+        data, _ = get(client, '/api/v1/titles/')
+        assert data['results'][0]['category'] is None
+
+        Genre.objects.create(name='Ужасы', slug='horror')
+        data, _ = get(client, '/api/v1/genres/')
+        assert 'horror' in [genre['slug'] for genre in data['results']]
+
+    def test_stats(self, client, admin_client, user_client, title):
+        get(client, '/api/v1/titles/')
+        get(client, '/api/v1/titles/')
+
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        stats = response.json()['namespaces']['titles']
+        assert (stats['hits'], stats['misses']) == (1, 1)
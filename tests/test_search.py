@@ -0,0 +1,75 @@
+import pytest
+
+from api_v1.models import Comment, Review, Title
+
+
+@pytest.fixture
+def reviews(title, user, another_user):
+    return [
+        Review.objects.create(title=title, author=user, text='Тюрьма и надежда, надежда!', score=9),
+        Review.objects.create(title=title, author=another_user, text='Про тюрьму', score=6),
+    ]
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def search(self, client, **params):
+        response = client.get('/api/v1/search/', params)
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    def test_reviews_are_ranked(self, client, reviews):
+        data = self.search(client, q='надежда', type='reviews')
+        assert data['count'] == 1
+        assert data['results'][0]['id'] == reviews[0].id
+        assert data['results'][0]['author'] == 'TestUser'
+
+    def test_index_follows_updates_and_deletes(self, client, reviews):
+        Review.objects.filter(pk=reviews[1].pk).update(text='Надежда есть')
+        assert self.search(client, q='надежда', type='reviews')['count'] == 2
+        reviews[0].delete()
+        data = self.search(client, q='надежда', type='reviews')
+        assert [item['id'] for item in data['results']] == [reviews[1].id]
+
+    def test_comments(self, client, reviews, user):
+        Comment.objects.create(review=reviews[0], author=user, text='Согласен с автором')
+        data = self.search(client, q='автором', type='comments')
+        assert data['count'] == 1
+
+    def test_titles_with_prefix_fallback(self, client, title):
+        Title.objects.create(name='Крестный отец', year=1972)
+        data = self.search(client, q='Шоушенка')
+        assert [item['name'] for item in data['results']] == ['Побег из Шоушенка']
+        assert data['results'][0]['category']['slug'] == 'movie'
+
+        data = self.search(client, q='Крестн')
+        assert [item['name'] for item in data['results']] == ['Крестный отец'], (
+            'Проверьте, что поиск по части названия находит произведение'
+        )
+
+    def test_pagination(self, client, category):
+        Title.objects.bulk_create(Title(name=f'Матрица {i}', year=1999) for i in range(15))
+        data = self.search(client, q='матрица', limit=10, offset=10)
+        assert data['count'] == 15
+        assert len(data['results']) == 5
+
+    def test_validation(self, client):
+        assert client.get('/api/v1/search/').status_code == 400
+        assert client.get('/api/v1/search/', {'q': 'a', 'type': 'users'}).status_code == 400
+
+
+class TestPostgresFallback:
+
+    def test_fuzzy_match_without_pg_trgm(self, monkeypatch):
+        from api_v1 import search
+
+        monkeypatch.setitem(search.trigrams, 'default', False)
+        source, order, params, order_params = search.PostgresSearch().fuzzy_match('titles', '50%_off')
+        assert '%%' not in source and 'ILIKE' in source, (
+            'Проверьте, что без pg_trgm нечёткий поиск не использует оператор %'
+        )
+        assert params == ['50\\%\\_off%'] and order_params == []
+
+        monkeypatch.setitem(search.trigrams, 'default', True)
+        assert '%%' in search.PostgresSearch().fuzzy_match('titles', 'x')[0]
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api_v1.authentication import (ChangedUsers, StatelessJWTAuthentication,
+                                   changed_users)
+from api_v1.cache import get_cache
+from api_v1.serializers import MyTokenObtainPairSerializer
+
+
+def client_with_claims(user):
+    client = APIClient()
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def user_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    # The time of the last change is read, not cached yet, the user is not.
+    lookups = [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "api_v1_customuser" WHERE "api_v1_customuser"."id" =' in query['sql']
+        and not query['sql'].startswith('SELECT "api_v1_customuser"."claims_changed" FROM')
+    ]
+    return response, lookups
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(APIView, 'authentication_classes', [StatelessJWTAuthentication])
+    changed_users.clear()
+    yield
+    changed_users.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('stateless')
+class TestStatelessAuth:
+
+    def test_token_has_claims(self, admin):
+        token = MyTokenObtainPairSerializer.get_token(admin).access_token
+        assert (token['username'], token['role']) == ('TestAdmin', 'admin')
+
+    def test_read_does_not_load_user(self, admin, title):
+        response, queries = user_queries(client_with_claims(admin), 'get', f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert queries == [], 'Проверьте, что чтение с токеном не загружает пользователя из БД'
+
+        response, queries = user_queries(client_with_claims(admin), 'get', '/api/v1/users/')
+        assert response.status_code == 200
+        assert queries == [], 'Роль администратора должна браться из токена'
+
+    def test_write_loads_user(self, user, title):
+        response, queries = user_queries(
+            client_with_claims(user), 'post', f'/api/v1/titles/{title.id}/reviews/', data={'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert queries
+        assert response.json()['author'] == user.username
+
+    def test_missing_attributes_are_loaded(self, user):
+        response = client_with_claims(user).get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+
+    def test_changed_user_is_loaded(self, admin):
+        client = client_with_claims(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+
+        admin.role = 'user'
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что после смены роли токен со старой ролью не используется'
+        )
+
+    def test_second_read_runs_no_query(self, admin):
+        client = client_with_claims(admin)
+        client.get('/api/v1/users/')
+        with CaptureQueriesContext(connection) as context:
+            assert client.get('/api/v1/categories/').status_code == 200
+        assert not [query for query in context.captured_queries if 'api_v1_customuser' in query['sql']]
+
+    def test_change_survives_cache_eviction(self, admin):
+        client = client_with_claims(admin)
+        admin.role = 'user'
+        admin.save(update_fields=['role'])
+        assert client.get('/api/v1/users/').status_code == 403
+
+        get_cache().clear()
+        changed_users.clear()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что отзыв токена не теряется при вытеснении из кеша'
+        )
+
+    def test_deletion_survives_cache_eviction(self, user, title):
+        client = client_with_claims(user)
+        user.delete()
+        get_cache().clear()
+        changed_users.clear()
+        assert client.get(f'/api/v1/titles/{title.id}/reviews/').status_code == 401
+
+    def test_deleted_user_is_rejected(self, user, title):
+        client = client_with_claims(user)
+        user.delete()
+        assert client.get(f'/api/v1/titles/{title.id}/reviews/').status_code == 401
+
+    def test_tokens_without_claims(self, user_client, title):
+        assert user_client.get(f'/api/v1/titles/{title.id}/reviews/').status_code == 200
+
+
+def test_changed_users_is_bounded():
+    lru = ChangedUsers(size=2)
+    for user_id in range(3):
+        lru.remember(user_id, 0, 0)
+    assert list(lru.entries) == [1, 2]
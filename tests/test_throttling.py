@@ -0,0 +1,141 @@
+import socketserver
+import threading
+
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api_v1.throttling import (AnonFixedWindowThrottle, CacheStore, RedisStore,
+                               SQLiteStore, StoreError, create_store)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Just enough of RESP for SET NX EX and INCR."""
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name, key = command[0], command[1]
+            if name == 'SET':
+                if key in data:
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    data[key] = int(command[2])
+                    self.wfile.write(b'+OK\r\n')
+            elif name == 'INCR':
+                data[key] = data.get(key, 0) + 1
+                self.wfile.write(b':%d\r\n' % data[key])
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+
+@pytest.fixture
+def redis_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.data = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestStores:
+
+    def test_cache_store(self):
+        store = CacheStore()
+        assert [store.incr('key', 60) for _ in range(3)] == [1, 2, 3]
+
+    def test_sqlite_store_is_shared(self, tmp_path):
+        path = str(tmp_path / 'throttle.sqlite3')
+        first, second = SQLiteStore(path), SQLiteStore(path)
+        assert first.incr('key', 60) == 1
+        assert second.incr('key', 60) == 2, 'Проверьте, что счётчик общий для всех процессов'
+        assert first.incr('other', 60) == 1
+
+    def test_sqlite_store_concurrent_increments(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / 'throttle.sqlite3'))
+        results = []
+
+        def worker():
+            results.extend(store.incr('key', 60) for _ in range(50))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results) == list(range(1, 201))
+
+    def test_redis_store(self, redis_server):
+        host, port = redis_server.server_address
+        store = create_store(f'redis://{host}:{port}/0')
+        assert isinstance(store, RedisStore)
+        assert [store.incr('key', 60) for _ in range(3)] == [1, 2, 3]
+        assert redis_server.data == {'key': 3}
+
+    def test_redis_store_unavailable(self, redis_server):
+        host, port = redis_server.server_address
+        redis_server.shutdown()
+        redis_server.server_close()
+        with pytest.raises(StoreError):
+            RedisStore(host, port).incr('key', 60)
+
+    def test_default_store_is_shared_by_the_workers(self):
+        from api_yamdb import settings as project_settings
+
+        assert isinstance(create_store(project_settings.THROTTLE_STORE), SQLiteStore), (
+            'Проверьте, что по умолчанию счётчики общие для всех воркеров'
+        )
+
+    def test_unknown_store(self):
+        with pytest.raises(ValueError):
+            create_store('memcached://localhost')
+
+
+class LowRateThrottle(AnonFixedWindowThrottle):
+    rate = '3/minute'
+
+
+class FailingStore:
+    def incr(self, key, window):
+        raise StoreError('down')
+
+
+class TestFixedWindowThrottle:
+
+    def request(self):
+        return Request(APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1'))
+
+    def test_limits_requests_in_window(self, settings):
+        settings.THROTTLE_STORE = 'cache'
+        allowed = [LowRateThrottle().allow_request(self.request(), None) for _ in range(5)]
+        assert allowed == [True, True, True, False, False]
+
+        throttle = LowRateThrottle()
+        throttle.allow_request(self.request(), None)
+        assert 0 < throttle.wait() <= 60
+
+    def test_store_unavailable_lets_requests_through(self, monkeypatch):
+        monkeypatch.setattr(LowRateThrottle, 'get_store', lambda self: FailingStore())
+        assert all(LowRateThrottle().allow_request(self.request(), None) for _ in range(5))
+
+    @pytest.mark.django_db
+    def test_api_returns_429(self, client, monkeypatch):
+        monkeypatch.setattr(AnonFixedWindowThrottle, 'THROTTLE_RATES', {'anon': '2/minute'})
+        statuses = [client.get('/api/v1/genres/').status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
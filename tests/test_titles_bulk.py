@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Title
+
+
+@pytest.mark.django_db
+class TestTitlesBulk:
+    url = '/api/v1/titles/bulk'
+
+    def test_creates_titles_with_genres(self, admin_client, category, genres):
+        payload = [
+            {'name': 'Фильм 1', 'year': 2000, 'category': 'movie', 'genre': ['drama', 'comedy']},
+            {'name': 'Фильм 2', 'description': 'Без года и категории'},
+        ]
+        response = admin_client.post(self.url, payload, format='json')
+        assert response.status_code == 201, response.content
+        results = response.json()
+        assert [result['status'] for result in results] == ['created', 'created']
+
+        first = Title.objects.get(pk=results[0]['id'])
+        assert first.category == category
+        assert set(first.genre.values_list('slug', flat=True)) == {'drama', 'comedy'}
+        assert Title.objects.get(pk=results[1]['id']).category is None
+
+    def test_partial_failure(self, admin_client, category, genres):
+        payload = [
+            {'name': 'Хороший', 'year': 2000, 'category': 'movie', 'genre': ['drama']},
+            {'name': 'Из будущего', 'year': datetime.now().year + 10},
+            {'name': 'Без категории', 'category': 'unknown'},
+            {'name': 'Без жанра', 'genre': ['drama', 'unknown']},
+            {'year': 2000},
+        ]
+        response = admin_client.post(self.url, payload, format='json')
+        assert response.status_code == 207, 'Проверьте, что при частичной ошибке возвращается 207'
+        results = response.json()
+        assert [result['index'] for result in results] == [0, 1, 2, 3, 4]
+        assert [result['status'] for result in results] == ['created'] + ['error'] * 4
+        assert 'year' in results[1]['errors']
+        assert 'category' in results[2]['errors']
+        assert 'genre' in results[3]['errors']
+        assert 'name' in results[4]['errors']
+        assert Title.objects.count() == 1
+
+    def test_slugs_resolved_in_two_queries(self, admin_client, category, genres):
+        payload = [{'name': f'Фильм {i}', 'category': 'movie', 'genre': ['drama']} for i in range(20)]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, payload, format='json')
+        assert response.status_code == 201
+        slug_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "api_v1_category"' in query['sql'] or 'FROM "api_v1_genre"' in query['sql']
+        ]
+        assert len(slug_queries) == 2, 'Проверьте, что категории и жанры запрашиваются одним запросом каждый'
+
+    def test_admin_only_and_list_required(self, user_client, admin_client):
+        assert user_client.post(self.url, [], format='json').status_code == 403
+        assert admin_client.post(self.url, {'name': 'x'}, format='json').status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_v1.models import Title, Title2Genre
+
+
+@pytest.mark.django_db
+class TestTitlesQueryCount:
+
+    def create_titles(self, amount, category, genres):
+        Title.objects.bulk_create(
+            Title(name=f'Title {i:04}', year=2000, category=category) for i in range(amount)
+        )
+        Title2Genre.objects.bulk_create(
+            Title2Genre(title=title, genre=genre) for title in Title.objects.all() for genre in genres
+        )
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(context.captured_queries), response.json()
+
+    def test_list_query_count_does_not_grow(self, client, category, genres):
+        self.create_titles(500, category, genres)
+
+        small, data = self.count_queries(client, '/api/v1/titles/?limit=10')
+        assert len(data['results']) == 10
+        large, data = self.count_queries(client, '/api/v1/titles/?limit=500')
+        assert len(data['results']) == 500
+
+        assert small == large, (
+            'Проверьте, что количество запросов к БД не зависит от размера страницы '
+            f'({small} запросов для 10 произведений и {large} для 500)'
+        )
+        assert data['results'][0]['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert len(data['results'][0]['genre']) == 2
+
+    def test_detail_query_count(self, client, title):
+        queries, data = self.count_queries(client, f'/api/v1/titles/{title.id}/')
+        assert queries == 2, 'Проверьте, что произведение отдается за два запроса к БД'
+        assert {genre['slug'] for genre in data['genre']} == {'drama', 'comedy'}